@@ -1,9 +1,13 @@
 
 import os
 import json
+import gzip
+import base64
+import binascii
 from datetime import datetime 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, g, jsonify, request, stream_with_context
 from snowflake.sqlalchemy import (VARIANT, ARRAY, OBJECT)
+from sqlalchemy import text
 
 
 import requests
@@ -11,6 +15,7 @@ import requests
 import snowflake
 
 from db import SnowflakeConnector
+from cache import ResponseCache
 from utils import datetime_to_str
 from security import api_required, generate_auth_token
 from status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_401_UNAUTHORIZED, HTTP_404_NOT_FOUND, HTTP_500_INTERNAL_SERVER_ERROR
@@ -32,8 +37,14 @@ db = SnowflakeConnector(
     auth=snowflake_auth
 )
 
-engine = db.create_engine()
-connection = engine.connect()
+engine = db.create_engine(
+    pool_size=int(os.getenv("pool_size", 5)),
+    max_overflow=int(os.getenv("pool_max_overflow", 10)),
+    pool_timeout=int(os.getenv("pool_timeout", 30)),
+    # Snowflake closes idle sessions, so recycle connections before that happens
+    pool_recycle=int(os.getenv("pool_recycle", 3600)),
+    pool_pre_ping=True,
+)
 
 tgt = os.getenv("target", "staging")
 
@@ -55,8 +66,45 @@ env = {
 tgt_db = env.get(tgt).get("db")
 tgt_schema = env.get(tgt).get("schema")
 
+# Number of metrics sent to Snowflake per insert statement
+insert_batch_size = int(os.getenv("insert_batch_size", 1000))
+
+# Number of metrics returned per page by GET /metric/operational
+default_page_size = int(os.getenv("default_page_size", 1000))
+max_page_size = int(os.getenv("max_page_size", 10000))
+
+# Order of GET /metric/operational, which is also its pagination cursor. The keys are never
+# null, so that rows can be compared with them, and the row id makes them unique.
+OPERATIONAL_METRIC_SORT_KEYS = (
+    "coalesce(run_id, -1)",
+    "coalesce(data:unique_id::string, '')",
+    "id",
+)
+
 app = Flask(__name__)
 
+# Read endpoints only change when metrics are posted, so their responses are cached until
+# then (or until the TTL expires, which bounds staleness across multiple API processes)
+response_cache = ResponseCache(
+    ttl=int(os.getenv("cache_ttl", 300)),
+    max_entries=int(os.getenv("cache_max_entries", 1024)),
+)
+
+
+def get_connection():
+    """Checks out a pooled connection for the current request. It is returned to the pool
+    when the request ends."""
+    if "connection" not in g:
+        g.connection = engine.connect()
+    return g.connection
+
+
+@app.teardown_appcontext
+def close_connection(exception):
+    connection = g.pop("connection", None)
+    if connection is not None:
+        connection.close()
+
 
 # Example data for demonstration purposes
 operational_metrics_data = {
@@ -73,23 +121,103 @@ business_metrics_data = {
 @app.route('/metric/operational', methods=['GET'])
 # @api_required
 def get_operational_metric():
-    data = []
-    results = connection.execute(f"select * from {tgt_db}.{tgt_schema}.src_operation_metric").fetchall()
-    for c in results:
-        data.append({
-            "project": c[0],
-            "run_id": c[1],
-            "metric": json.loads(c[2]),
-            "generated_at": c[3],
-            "inserted_at": c[4],
-        })
-    return jsonify(data), HTTP_200_OK
+    """Returns one page of operational metrics, ordered by run id and node, as
+    {"data": [...], "next_cursor": ...}. Pass next_cursor back as `cursor` to get the next
+    page; it is null on the last page. Optional filters: project, run_id, and start/end
+    (ISO timestamps) on generated_at.
+
+    A run is uploaded again when it is collected again, so (run_id, unique_id) is not
+    unique and the row id breaks ties. Missing run ids and nodes sort first."""
+    try:
+        limit = min(int(request.args.get("limit", default_page_size)), max_page_size)
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        after = decode_cursor(request.args.get("cursor"))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid pagination parameters: {e}"}), HTTP_400_BAD_REQUEST
+
+    filters = []
+    params = {"limit": limit + 1}
+    for name, clause in [
+        ("project", "project = :project"),
+        ("run_id", "run_id = :run_id"),
+        ("start", "generated_at >= to_timestamp(:start)"),
+        ("end", "generated_at < to_timestamp(:end)"),
+    ]:
+        if request.args.get(name) is not None:
+            filters.append(clause)
+            params[name] = request.args.get(name)
+    if after is not None:
+        filters.append(keyset_filter(OPERATIONAL_METRIC_SORT_KEYS))
+        params.update({f"after_{i}": value for i, value in enumerate(after)})
+
+    where = f"where {' and '.join(filters)}" if filters else ""
+    results = get_connection().execute(text(f"""
+        select project, run_id, data, generated_at, inserted_at, {', '.join(OPERATIONAL_METRIC_SORT_KEYS)}
+        from {tgt_db}.{tgt_schema}.src_operation_metric
+        {where}
+        order by {', '.join(OPERATIONAL_METRIC_SORT_KEYS)}
+        limit :limit"""), params)
+
+    def generate():
+        # The metric is emitted as the JSON text stored in the variant column instead of
+        # being parsed and serialised again
+        yield '{"data":['
+        last = None
+        has_more = False
+        for i, c in enumerate(results):
+            if i == limit:
+                has_more = True
+                break
+            if i > 0:
+                yield ','
+            yield (
+                f'{{"project":{json.dumps(c[0])},"run_id":{json.dumps(c[1])},"metric":{c[2] if c[2] is not None else "null"},'
+                f'"generated_at":{json.dumps(datetime_to_iso(c[3]))},"inserted_at":{json.dumps(datetime_to_iso(c[4]))}}}'
+            )
+            last = c
+        results.close()
+        next_cursor = encode_cursor(*last[5:]) if has_more else None
+        yield f'],"next_cursor":{json.dumps(next_cursor)}}}'
+
+    return Response(stream_with_context(generate()), status=HTTP_200_OK, mimetype="application/json")
+
+
+def keyset_filter(keys):
+    """Returns the condition selecting the rows that sort after the row whose keys are
+    bound to :after_0, :after_1, ... when ordered by keys. The keys must not be null."""
+    conditions = []
+    for i, key in enumerate(keys):
+        equal = [f"{previous} = :after_{j}" for j, previous in enumerate(keys[:i])]
+        conditions.append(f"({' and '.join(equal + [f'{key} > :after_{i}'])})")
+    return f"({' or '.join(conditions)})"
+
+
+def encode_cursor(*keys):
+    return base64.urlsafe_b64encode(json.dumps(keys).encode()).decode()
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        keys = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (TypeError, ValueError, binascii.Error) as e:
+        raise ValueError(f"malformed cursor {cursor}") from e
+    if not isinstance(keys, list) or len(keys) != len(OPERATIONAL_METRIC_SORT_KEYS):
+        raise ValueError(f"malformed cursor {cursor}")
+    return tuple(keys)
+
+
+def datetime_to_iso(value):
+    return value.isoformat() if isinstance(value, datetime) else value
 
 @app.route('/metric/operational/<node_id>', methods=['GET'])
+@response_cache.cached
 def get_operational_metric_by_id(node_id):
     data = []
     try:
-        results = connection.execute(f"""
+        results = get_connection().execute(text(f"""
             select distinct
             data:unique_id::string as unique_id,
             data:affected_rows::int as affected_rows,
@@ -98,7 +226,7 @@ def get_operational_metric_by_id(node_id):
             data:collected_at::timestamp_tz as collected_at
             from {tgt_db}.{tgt_schema}.src_operation_metric
             where data:unique_id = '{node_id}'
-            order by collected_at""")
+            order by collected_at"""))
         for c in results:
             data.append({
                 "unique_id": c[0],
@@ -115,10 +243,11 @@ def get_operational_metric_by_id(node_id):
 
 # Example endpoint to get business metrics
 @app.route('/metric/business', methods=['GET'])
+@response_cache.cached
 def get_business_metric():
     data = []
 
-    results = connection.execute(f"select * from {tgt_db}.{tgt_schema}.src_business_metric").fetchall()
+    results = get_connection().execute(text(f"select * from {tgt_db}.{tgt_schema}.src_business_metric")).fetchall()
     for c in results:
         data.append(c)
     return jsonify(data), HTTP_200_OK
@@ -127,42 +256,82 @@ def get_business_metric():
 @app.route('/metric/operational', methods=['POST'])
 def add_operational_metric():
     data = request.get_json()
-    project = data.get("project")
-    run_id = data.get("run_id")
-    metrics = data.get("metrics", [])
-    generated_at = data.get("generated_at")
-    inserted_at = datetime_to_str(datetime.now())
+    return store_operational_metrics([data])
 
-    # ser_metrics = json.dumps(metrics)    
 
-    print(f"""
+@app.route('/metric/operational/bulk', methods=['POST'])
+def add_operational_metrics_bulk():
+    """Accepts a JSON list of run payloads, optionally gzip'd (Content-Encoding: gzip),
+    and inserts all of their metrics in one transaction."""
+    try:
+        body = request.get_data()
+        if request.headers.get("Content-Encoding", "").lower() == "gzip":
+            body = gzip.decompress(body)
+        payloads = json.loads(body)
+    except (OSError, ValueError) as e:
+        return jsonify({"error": f"Invalid payload: {e}"}), HTTP_400_BAD_REQUEST
+    if not isinstance(payloads, list):
+        return jsonify({"error": "Payload should be a list"}), HTTP_400_BAD_REQUEST
+    return store_operational_metrics(payloads)
+
+
+def store_operational_metrics(payloads):
+    inserted_at = datetime_to_str(datetime.now())
+    rows = []
+    for data in payloads:
+        project = data.get("project")
+        run_id = data.get("run_id")
+        metrics = data.get("metrics", [])
+        generated_at = data.get("generated_at")
+
+        print(f"""
     project: {project}
     run_id: {run_id}
-    metric: {metrics}
-    generated_at: {generated_at}      
+    metrics: {len(metrics)}
+    generated_at: {generated_at}
 """)
-    
+
+        rows.extend(
+            {
+                "project": project,
+                "run_id": run_id,
+                "data": json.dumps(m),
+                "generated_at": generated_at,
+                "inserted_at": inserted_at,
+            }
+            for m in metrics
+        )
     try:
-        stmt = []
-        for m in metrics:
-            st = f"select '{project}', '{run_id}', parse_json('{json.dumps(m)}'), '{generated_at}', '{inserted_at}'"
-            stmt.append(st)
-    
-        insmt="\nunion all\n".join(stmt)
-        print(stmt)
-        results= (10,0)
-
-        results = connection.execute(
-                f"insert into {tgt_db}.{tgt_schema}.src_operation_metric(project, run_id, data, generated_at, inserted_at)"
-                f"{insmt}"
-               ).fetchone()
-        print(results[0])
-        return jsonify({"message": f"Operational metric added successfully, {results[0]} inserted"}), HTTP_200_OK
+        # All batches are committed together, or none of them
+        with engine.begin() as connection:
+            inserted = insert_operational_metrics(connection, rows, batch_size=insert_batch_size)
+        response_cache.clear()
+        return jsonify({"message": f"Operational metric added successfully, {inserted} inserted", "inserted": inserted, "runs": len(payloads)}), HTTP_200_OK
     except snowflake.connector.errors.ProgrammingError as e:
         print(e)
         print('Error {0} ({1}): {2} ({3})'.format(e.errno, e.sqlstate, e.msg, e.sfqid))
         return jsonify({"error": str(e)}), HTTP_400_BAD_REQUEST
 
+
+def insert_operational_metrics(connection, rows, batch_size=insert_batch_size):
+    """Inserts metric rows with bound parameters, batch_size rows per statement, and
+    returns the number of inserted rows.
+
+    parse_json is not allowed in a VALUES clause, so the rows are selected from VALUES. The
+    Snowflake connector rewrites executemany of such a statement into a single multi-row
+    insert per batch."""
+    stmt = text(
+        f"insert into {tgt_db}.{tgt_schema}.src_operation_metric(project, run_id, data, generated_at, inserted_at) "
+        "select column1, column2, parse_json(column3), column4, column5 "
+        "from values (:project, :run_id, :data, :generated_at, :inserted_at)"
+    )
+    inserted = 0
+    for i in range(0, len(rows), batch_size):
+        batch = rows[i:i + batch_size]
+        result = connection.execute(stmt, batch)
+        inserted += result.rowcount if result.rowcount >= 0 else len(batch)
+    return inserted
+
 # Example endpoint to add new business metric
 @app.route('/metric/business', methods=['POST'])
 def add_business_metric():
@@ -183,11 +352,26 @@ def add_business_metric():
 
 @app.route('/metric/version', methods=['GET'])
 def get_version():
-    result = connection.execute(
-        "select current_version()"
+    result = get_connection().execute(
+        text("select current_version()")
     ).fetchone()
     return jsonify({"version": result[0]})
 
+@app.route('/metric/pool', methods=['GET'])
+def get_pool_status():
+    pool = engine.pool
+    return jsonify({
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+        "status": pool.status(),
+    }), HTTP_200_OK
+
+@app.route('/metric/cache', methods=['GET'])
+def get_cache_stats():
+    return jsonify(response_cache.stats()), HTTP_200_OK
+
 @app.route('/metric/ping', methods=['GET'])
 def ping():
     return jsonify({"message": "pong"})
@@ -0,0 +1,84 @@
+import functools
+import threading
+import time
+from flask import Response, current_app, request
+
+
+class ResponseCache(object):
+    """In-process cache of successful GET responses, keyed by path and query parameters.
+
+    Entries expire after `ttl` seconds and the oldest entry is dropped once `max_entries`
+    is reached. Call `clear()` whenever the underlying data changes.
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key():
+        return request.path, tuple(sorted(request.args.items(multi=True)))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value, generation: int = None) -> None:
+        with self._lock:
+            # The cache was cleared while the value was computed, so it may be stale
+            if generation is not None and generation != self.generation:
+                return
+            self._entries.pop(key, None)
+            if len(self._entries) >= self.max_entries:
+                # Dicts keep insertion order, so the first entry is the oldest
+                del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "ttl": self.ttl,
+            }
+
+    def cached(self, func):
+        """Decorates a view so that its 200 responses are served from the cache."""
+
+        @functools.wraps(func)
+        def decorator(*args, **kwargs):
+            key = self.make_key()
+            generation = self.generation
+            entry = self.get(key)
+            if entry is not None:
+                body, mimetype = entry
+                return Response(
+                    body, status=200, mimetype=mimetype, headers={"X-Cache": "HIT"}
+                )
+
+            response = current_app.make_response(func(*args, **kwargs))
+            if response.status_code == 200 and not response.is_streamed:
+                self.set(key, (response.get_data(), response.mimetype), generation)
+            response.headers["X-Cache"] = "MISS"
+            return response
+
+        return decorator
@@ -48,8 +48,8 @@ class SnowflakeConnector():
         print('Connecting to snowflake')
         return conn
     
-    def create_engine(self):
-        return create_engine(self.to_database_url())
+    def create_engine(self, **kwargs):
+        return create_engine(self.to_database_url(), **kwargs)
     
     def engine_args(self):
         return dict(session_parameters={
@@ -1,4 +1,5 @@
 create table if not exists zz_chenxuan_rong_dev.metrics.src_operation_metric (
+  id integer autoincrement start 1 increment 1 order,
   project varchar,
   run_id integer,
   data variant,
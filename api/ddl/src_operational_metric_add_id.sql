@@ -0,0 +1,17 @@
+-- Adds the id column, which GET /metric/operational uses to order and paginate duplicate
+-- metrics, to a src_operation_metric table created before it existed. An identity column
+-- cannot be added to a table that has rows, so the table is rebuilt and swapped.
+create or replace table zz_chenxuan_rong_dev.metrics.src_operation_metric_with_id (
+  id integer autoincrement start 1 increment 1 order,
+  project varchar,
+  run_id integer,
+  data variant,
+  generated_at datetime,
+  inserted_at datetime
+);
+insert into zz_chenxuan_rong_dev.metrics.src_operation_metric_with_id(project, run_id, data, generated_at, inserted_at)
+select project, run_id, data, generated_at, inserted_at
+from zz_chenxuan_rong_dev.metrics.src_operation_metric
+order by inserted_at;
+alter table zz_chenxuan_rong_dev.metrics.src_operation_metric swap with zz_chenxuan_rong_dev.metrics.src_operation_metric_with_id;
+drop table zz_chenxuan_rong_dev.metrics.src_operation_metric_with_id;
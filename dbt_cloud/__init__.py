@@ -1,12 +1,16 @@
 import logging
 import os
 import sys
-from ruamel import yaml
 import json
+from datetime import datetime
+from functools import lru_cache
 
-from rich.console import Console
 
-console = Console()
+@lru_cache(maxsize=None)
+def get_console():
+    # rich is only needed once something is printed, so keep it off the import path of the CLI
+    from rich.console import Console
+    return Console()
 
 def create_logger(name) -> logging.Logger:
     log_level = logging.WARNING
@@ -35,6 +39,8 @@ __version__ = get_version()
 
 
 def safe_load_yaml(file_path):
+    from ruamel import yaml
+
     try:
         with open(file_path, 'r') as f:
             payload = yaml.safe_load(f)
@@ -60,23 +66,119 @@ def ensure_directory_writable(directory) -> bool:
         except BaseException:
             return False
 
-def write_to_file(data: dict, name:str, report_dir:str = None) -> str:
+REPORT_NAMES = ['metric.json']
+RUN_RESULTS_DIR = 'run_results'
 
-    if name not in ['metric.json', 'run_results.json']:
-        print('Report name not supported. Expected one of [metric.json, run_results.json]')
-        return
 
+def get_report_dir(report_dir: str = None) -> str:
     if not report_dir:
         dir = os.path.join(os.getcwd(), '.artifacts')
     else:
         dir = report_dir
 
     if ensure_directory_writable(dir):
-        filepath = os.path.join(dir, name)
-    else:
-        filepath = os.path.join('/tmp', name)
+        return dir
+    return '/tmp'
+
+
+def get_report_path(name: str, report_dir: str = None) -> str:
+    return os.path.join(get_report_dir(report_dir), name)
+
+
+def get_run_results_path(job_id, run_id, report_dir: str = None) -> str:
+    """Path of the compressed run_results.json of a run, partitioned by job:
+    run_results/job_id=<job_id>/<job_id>-<run_id>-run_results.json.gz"""
+    dir = os.path.join(get_report_dir(report_dir), RUN_RESULTS_DIR, f'job_id={job_id}')
+    os.makedirs(dir, exist_ok=True)
+    return os.path.join(dir, f'{job_id}-{run_id}-run_results.json.gz')
+
+
+class JsonArrayWriter(object):
+    """Writes a report as a JSON array one element at a time, so that the elements never
+    have to be held in memory together."""
+
+    def __init__(self, name: str, report_dir: str = None) -> None:
+        if name not in REPORT_NAMES:
+            raise ValueError(f'Report name not supported. Expected one of {REPORT_NAMES}')
+        self.filepath = get_report_path(name, report_dir)
+        self.count = 0
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.filepath, 'wb')
+        self._file.write(b'[')
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.write(b']')
+        self._file.close()
+        if exc_info[0] is None:
+            get_console().print(f"Results saved to {self.filepath}")
+
+    def write(self, item) -> None:
+        if self.count > 0:
+            self._file.write(b',')
+        self.count += 1
+        self._file.write(json.dumps(item, separators=(',', ':')).encode())
+
+
+class ParquetMetricWriter(object):
+    """Writes the node metrics of run payloads to metric.parquet (requires the 'parquet'
+    extra), one row group per run.
+
+    Columns are typed and zstd compressed, and the repetitive string columns are
+    dictionary encoded."""
+
+    DICTIONARY_COLUMNS = ['unique_id', 'job_name', 'dbt_version', 'status']
+
+    def __init__(self, report_dir: str = None) -> None:
+        import pyarrow as pa
+
+        self.filepath = get_report_path('metric.parquet', report_dir)
+        self.count = 0
+        self.schema = pa.schema([
+            ('unique_id', pa.string()),
+            ('job_id', pa.int64()),
+            ('job_name', pa.string()),
+            ('run_id', pa.int64()),
+            ('dbt_version', pa.string()),
+            ('execution_time', pa.float64()),
+            ('affected_rows', pa.int64()),
+            ('status', pa.string()),
+            ('collected_at', pa.timestamp('us', tz='UTC')),
+        ])
+        self._writer = None
+
+    def __enter__(self):
+        import pyarrow.parquet as pq
+
+        self._writer = pq.ParquetWriter(
+            self.filepath,
+            self.schema,
+            compression='zstd',
+            use_dictionary=self.DICTIONARY_COLUMNS,
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        self._writer.close()
+        if exc_info[0] is None:
+            get_console().print(f"Results saved to {self.filepath}")
+
+    def write(self, item) -> None:
+        import pyarrow as pa
+
+        metrics = item.get('metrics', [])
+        if not metrics:
+            return
+        columns = {name: [m.get(name) for m in metrics] for name in self.schema.names}
+        columns['collected_at'] = [parse_timestamp(value) for value in columns['collected_at']]
+        self._writer.write_table(pa.Table.from_pydict(columns, schema=self.schema))
+        self.count += 1
+
+
+def parse_timestamp(value):
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
 
-    with open(filepath, 'w') as f:
-        f.write(json.dumps(data, separators=(',', ':')))
-        console.print(f"Results saved to {filepath}")
-        return filepath
\ No newline at end of file
@@ -0,0 +1,105 @@
+import os
+import hashlib
+import tempfile
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from dbt_cloud.field import get_env
+
+
+def default_cache_dir() -> str:
+    return get_env(
+        "DBT_CLOUD_CACHE_DIR",
+        default=os.path.join(
+            os.path.expanduser("~"), ".cache", "dbt-cloud", "artifacts"
+        ),
+    )
+
+
+def default_cache_max_size() -> int:
+    return int(get_env("DBT_CLOUD_CACHE_SIZE_MB", default=1024)) * 1024 * 1024
+
+
+class ArtifactCache(object):
+    """Size-bounded on-disk cache for run artifacts with least recently used eviction.
+
+    Entries are keyed by (account_id, run_id, step, path) and stored under the SHA-256 of
+    the key. Reading an entry refreshes its modification time, which is used as the
+    recency for eviction.
+    """
+
+    def __init__(self, directory: str = None, max_size: int = None) -> None:
+        self.directory = directory or default_cache_dir()
+        self.max_size = default_cache_max_size() if max_size is None else max_size
+
+    @staticmethod
+    def make_key(account_id, run_id, step, path) -> str:
+        step = "last" if step is None else step
+        return hashlib.sha256(
+            f"{account_id}/{run_id}/{step}/{path}".encode()
+        ).hexdigest()
+
+    def _entry_path(self, key: Tuple) -> str:
+        return os.path.join(self.directory, self.make_key(*key))
+
+    def get_path(self, key: Tuple) -> Optional[str]:
+        """Returns the path of a cached entry and marks it as recently used."""
+        entry_path = self._entry_path(key)
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        return entry_path
+
+    def get(self, key: Tuple) -> Optional[bytes]:
+        entry_path = self.get_path(key)
+        if entry_path is None:
+            return None
+        try:
+            with open(entry_path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def writer(self, key: Tuple):
+        """Yields a binary file that is stored as the entry for key once the block exits
+        without an exception."""
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                yield f
+            if os.path.getsize(tmp_path) <= self.max_size:
+                os.replace(tmp_path, self._entry_path(key))
+                self.evict()
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def put(self, key: Tuple, content: bytes) -> None:
+        if len(content) > self.max_size:
+            return
+        with self.writer(key) as f:
+            f.write(content)
+
+    def evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_size -= size
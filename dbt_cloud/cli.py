@@ -1,12 +1,12 @@
 import os
 import sys
-import time
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import click
-from rich.console import Console
+import requests
 
-from dbt_cloud import __version__
+from dbt_cloud import __version__, get_console
 from dbt_cloud.command import (
     DbtCloudJobGetCommand,
     DbtCloudJobCreateCommand,
@@ -29,26 +29,57 @@ from dbt_cloud.command import (
     DbtCloudRunStatus,
 )
 from dbt_cloud.demo import data_catalog
-from dbt_cloud.serde import json_to_dict, dict_to_json
+from dbt_cloud.serde import json_to_dict, dict_to_json, dict_to_ndjson
 from dbt_cloud.exc import DbtCloudException
 from dbt_cloud.field import PythonLiteralOption
-from dbt_cloud.configuration import Configuration
-from dbt_cloud.collect import Collector
-from dbt_cloud.initializer import Initializer
+from dbt_cloud.waiter import RunWaiter
 from dbt_cloud.exitcode import EC_OK, EC_ERR_GENERAL, EC_ERR_TEST_FAILED
 
-def execute_and_print(command, **kwargs):
+def echo_ndjson(records):
+    for record in records:
+        click.echo(dict_to_ndjson(record))
+
+
+def execute_and_print(command, output="json", **kwargs):
     response = command.execute(**kwargs)
-    click.echo(dict_to_json(response.json()))
+    if output == "ndjson" and response.ok:
+        echo_ndjson(response.json()["data"])
+    else:
+        click.echo(dict_to_json(response.json()))
     response.raise_for_status()
     return response
 
 
+def execute_concurrently(commands, concurrency):
+    """Executes commands on a bounded thread pool and yields (command, response, error)
+    tuples in completion order. Failed requests are yielded with the error instead of
+    raising so that the remaining commands still run."""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(command.execute): command for command in commands}
+        for future in as_completed(futures):
+            command = futures[future]
+            try:
+                response = future.result()
+                response.raise_for_status()
+            except requests.RequestException as e:
+                yield command, None, e
+            else:
+                yield command, response, None
+
+
 debug_option = [
     click.option('--debug', is_flag=True, help='Enable debug mode.')
 ]
 
-console = Console()
+output_option = [
+    click.option(
+        "--output",
+        type=click.Choice(["json", "ndjson"]),
+        default="json",
+        help="Output format. ndjson prints one compact JSON record per line.",
+    )
+]
+
 
 def add_options(options):
     def _add_options(func):
@@ -114,6 +145,12 @@ def metadata():
     default=False,
     help="Wait for the process to finish before returning from the API call.",
 )
+@click.option(
+    "--wait-timeout",
+    default=None,
+    type=click.FLOAT,
+    help="Maximum number of seconds to wait for the run to finish (no limit by default).",
+)
 @click.option(
     "-f",
     "--file",
@@ -121,40 +158,105 @@ def metadata():
     type=click.File("w"),
     help="Response export file path.",
 )
-def run(wait, file, **kwargs):
+def run(wait, wait_timeout, file, **kwargs):
     command = DbtCloudJobRunCommand.from_click_options(**kwargs)
     response = command.execute()
 
     if wait:
+        response.raise_for_status()
         run_id = response.json()["data"]["id"]
-        while True:
-            run_get_command = DbtCloudRunGetCommand(
-                api_token=command.api_token,
-                account_id=command.account_id,
-                dbt_cloud_host=command.dbt_cloud_host,
-                run_id=run_id,
-            )
-            response = run_get_command.execute()
-            status = DbtCloudRunStatus(response.json()["data"]["status"])
+        waiter = RunWaiter(
+            api_token=command.api_token,
+            account_id=command.account_id,
+            dbt_cloud_host=command.dbt_cloud_host,
+            timeout=wait_timeout,
+        )
+
+        def echo_status(run_dict):
+            status = DbtCloudRunStatus(run_dict["status"])
             click.echo(f"Job {command.job_id} run {run_id}: {status.name} ...")
-            if status == DbtCloudRunStatus.SUCCESS:
-                break
-            elif status in (DbtCloudRunStatus.ERROR, DbtCloudRunStatus.CANCELLED):
-                href = response.json()["data"]["href"]
-                raise DbtCloudException(
-                    f"Job run failed with {status.name} status. For more information, see {href}."
-                )
-            time.sleep(5)
+
+        run_dict = waiter.wait_for_run(run_id, on_status=echo_status)
+        status = DbtCloudRunStatus(run_dict["status"])
+        if status in (DbtCloudRunStatus.ERROR, DbtCloudRunStatus.CANCELLED):
+            raise DbtCloudException(
+                f"Job run failed with {status.name} status. For more information, see {run_dict['href']}."
+            )
+        response = DbtCloudRunGetCommand(
+            api_token=command.api_token,
+            account_id=command.account_id,
+            dbt_cloud_host=command.dbt_cloud_host,
+            run_id=run_id,
+        ).execute()
 
     file.write(dict_to_json(response.json()))
     response.raise_for_status()
 
 
+@job.command(help="Triggers runs of many jobs and waits for them to finish.")
+@DbtCloudAccountCommand.click_options
+@click.option(
+    "--job-ids",
+    cls=PythonLiteralOption,
+    required=True,
+    help="List of job IDs to run, e.g., '[43167, 43168]'.",
+)
+@click.option(
+    "--cause",
+    default="Triggered via API",
+    help="A text description of the reason for running the jobs",
+)
+@click.option(
+    "--max-in-flight",
+    default=10,
+    type=click.IntRange(min=1),
+    help="Maximum number of runs that are triggered but not finished at a time.",
+)
+@click.option(
+    "--wait-timeout",
+    default=None,
+    type=click.FLOAT,
+    help="Maximum number of seconds to wait for all runs to finish (no limit by default).",
+)
+@click.option(
+    "-f",
+    "--file",
+    default="-",
+    type=click.File("w"),
+    help="Results export file path.",
+)
+def run_many(job_ids, cause, max_in_flight, wait_timeout, file, **kwargs):
+    base_command = DbtCloudAccountCommand.from_click_options(**kwargs)
+    commands = [
+        DbtCloudJobRunCommand(**base_command.dict(), job_id=job_id, cause=cause)
+        for job_id in job_ids
+    ]
+    waiter = RunWaiter(**base_command.dict(), timeout=wait_timeout)
+
+    def echo_status(run_dict):
+        status = DbtCloudRunStatus(run_dict["status"])
+        click.echo(
+            f"Job {run_dict['job_definition_id']} run {run_dict['id']}: {status.name} ..."
+        )
+
+    results = waiter.run_jobs(commands, max_in_flight=max_in_flight, on_status=echo_status)
+    file.write(dict_to_json({"data": results}))
+
+    failed = [
+        result["job_id"]
+        for result in results
+        if result["run_id"] is None or result["status"] != DbtCloudRunStatus.SUCCESS.name
+    ]
+    if failed:
+        raise DbtCloudException(f"Runs of jobs {failed} did not succeed.")
+
+
 @job.command(help=DbtCloudJobListCommand.get_description())
 @DbtCloudJobListCommand.click_options
-def list(**kwargs):
+@add_options(output_option)
+def list(output, **kwargs):
     command = DbtCloudJobListCommand.from_click_options(**kwargs)
-    execute_and_print(command)
+    execute_and_print(command, output=output)
 
 
 @job.command(help=DbtCloudJobGetCommand.get_description())
@@ -197,7 +299,13 @@ def delete(**kwargs):
     type=click.File("w"),
     help="Response export file path.",
 )
-def delete_all(keep_jobs, dry_run, file, assume_yes, **kwargs):
+@click.option(
+    "--concurrency",
+    default=8,
+    type=click.IntRange(min=1),
+    help="Number of requests executed in parallel.",
+)
+def delete_all(keep_jobs, dry_run, file, assume_yes, concurrency, **kwargs):
     list_command = DbtCloudJobListCommand.from_click_options(**kwargs)
     response = list_command.execute()
     response.raise_for_status()
@@ -207,20 +315,37 @@ def delete_all(keep_jobs, dry_run, file, assume_yes, **kwargs):
         if job_dict["id"] not in keep_jobs
     ]
     click.echo(f"Jobs to delete: {job_ids_to_delete}")
-    deleted_job_responses = []
+    deleted_job_responses = {}
+    failed_job_ids = []
     if not dry_run:
-        for job_id in job_ids_to_delete:
-            delete_command = DbtCloudJobDeleteCommand(**kwargs, job_id=job_id)
-            if assume_yes:
-                is_confirmed = True
+        delete_commands = [
+            DbtCloudJobDeleteCommand(**kwargs, job_id=job_id)
+            for job_id in job_ids_to_delete
+            if assume_yes or click.confirm(f"Delete job {job_id}?")
+        ]
+        results = execute_concurrently(delete_commands, concurrency)
+        for i, (command, response, error) in enumerate(results, start=1):
+            progress = f"[{i}/{len(delete_commands)}]"
+            if error is None:
+                deleted_job_responses[command.job_id] = response.json()
+                click.echo(f"{progress} Job {command.job_id} was deleted.")
             else:
-                is_confirmed = click.confirm(f"Delete job {job_id}?")
-            if is_confirmed:
-                response = delete_command.execute()
-                response.raise_for_status()
-                deleted_job_responses.append(response.json())
-                click.echo(f"Job {job_id} was deleted.")
-    file.write(dict_to_json(deleted_job_responses))
+                failed_job_ids.append(command.job_id)
+                click.echo(f"{progress} Job {command.job_id} was not deleted: {error}", err=True)
+        click.echo(
+            f"Deleted {len(deleted_job_responses)} jobs, {len(failed_job_ids)} failed."
+        )
+    file.write(
+        dict_to_json(
+            [
+                deleted_job_responses[int(job_id)]
+                for job_id in job_ids_to_delete
+                if int(job_id) in deleted_job_responses
+            ]
+        )
+    )
+    if failed_job_ids:
+        raise DbtCloudException(f"Failed to delete jobs {sorted(failed_job_ids)}.")
 
 
 @job.command(help="Exports a dbt Cloud job as JSON to a file.")
@@ -279,26 +404,49 @@ def cancel(**kwargs):
     type=click.File("w"),
     help="Response export file path.",
 )
-def cancel_all(dry_run, file, assume_yes, **kwargs):
+@click.option(
+    "--concurrency",
+    default=8,
+    type=click.IntRange(min=1),
+    help="Number of requests executed in parallel.",
+)
+def cancel_all(dry_run, file, assume_yes, concurrency, **kwargs):
     list_command = DbtCloudRunListCommand.from_click_options(**kwargs)
     response = list_command.execute()
     response.raise_for_status()
     run_ids_to_cancel = [run_dict["id"] for run_dict in response.json()["data"]]
     click.echo(f"Runs to cancel: {run_ids_to_cancel}")
-    cancelled_job_responses = []
+    cancelled_job_responses = {}
+    failed_run_ids = []
     if not dry_run:
-        for run_id in run_ids_to_cancel:
-            cancel_command = DbtCloudRunCancelCommand(**kwargs, run_id=run_id)
-            if assume_yes:
-                is_confirmed = True
+        cancel_commands = [
+            DbtCloudRunCancelCommand(**kwargs, run_id=run_id)
+            for run_id in run_ids_to_cancel
+            if assume_yes or click.confirm(f"Cancel run {run_id}?")
+        ]
+        results = execute_concurrently(cancel_commands, concurrency)
+        for i, (command, response, error) in enumerate(results, start=1):
+            progress = f"[{i}/{len(cancel_commands)}]"
+            if error is None:
+                cancelled_job_responses[command.run_id] = response.json()
+                click.echo(f"{progress} Run {command.run_id} has been cancelled.")
             else:
-                is_confirmed = click.confirm(f"Cancel run {run_id}?")
-            if is_confirmed:
-                response = cancel_command.execute()
-                response.raise_for_status()
-                cancelled_job_responses.append(response.json())
-                click.echo(f"Run {run_id} has been cancelled.")
-    file.write(dict_to_json(cancelled_job_responses))
+                failed_run_ids.append(command.run_id)
+                click.echo(f"{progress} Run {command.run_id} was not cancelled: {error}", err=True)
+        click.echo(
+            f"Cancelled {len(cancelled_job_responses)} runs, {len(failed_run_ids)} failed."
+        )
+    file.write(
+        dict_to_json(
+            [
+                cancelled_job_responses[int(run_id)]
+                for run_id in run_ids_to_cancel
+                if int(run_id) in cancelled_job_responses
+            ]
+        )
+    )
+    if failed_run_ids:
+        raise DbtCloudException(f"Failed to cancel runs {sorted(failed_run_ids)}.")
 
 
 @job_run.command(help=DbtCloudRunGetCommand.get_description())
@@ -324,32 +472,30 @@ def list_artifacts(**kwargs):
     is_flag=True,
     help="Return all runs using pagination (ignores limit and offset).",
 )
-def list(**kwargs):
+@click.option(
+    "--concurrency",
+    default=4,
+    type=click.IntRange(min=1),
+    help="Number of pages fetched in parallel when paginating.",
+)
+@add_options(output_option)
+def list(output, **kwargs):
     paginate = kwargs.pop("paginate")
+    concurrency = kwargs.pop("concurrency")
     command = DbtCloudRunListCommand.from_click_options(**kwargs)
     if not paginate:
-        execute_and_print(command)
+        execute_and_print(command, output=output)
+    elif output == "ndjson":
+        echo_ndjson(command.paginate(max_workers=concurrency))
     else:
-        command.offset = 0
-        command.limit = 100
-        responses = []
-        while True:
-            response = command.execute()
-            response.raise_for_status()
-            responses.append(response)
-            command.offset += response.json()["extra"]["pagination"]["count"]
-            if command.offset >= response.json()["extra"]["pagination"]["total_count"]:
-                break
-
-        # Use last response and append all data to it
-        last_response_dict = responses[-1].json()
-        last_response_dict["data"] = []
-        for response in responses:
-            last_response_dict["data"].extend(response.json()["data"])
-        last_response_dict["extra"]["pagination"]["count"] = len(
-            last_response_dict["data"]
-        )
-        click.echo(dict_to_json(last_response_dict))
+        pages = command.iter_pages(max_workers=concurrency)
+
+        # Use first response and append all data to it
+        response_dict = next(pages)
+        for page in pages:
+            response_dict["data"].extend(page["data"])
+        response_dict["extra"]["pagination"]["count"] = len(response_dict["data"])
+        click.echo(dict_to_json(response_dict))
 
 
 @job_run.command(help=DbtCloudRunGetArtifactCommand.get_description())
@@ -363,6 +509,20 @@ def list(**kwargs):
 )
 def get_artifact(file, **kwargs):
     command = DbtCloudRunGetArtifactCommand.from_click_options(**kwargs)
+    if not command.no_cache and command.step is None:
+        # Artifacts of the last step are only cached once the run is complete, so the run
+        # is only looked up when the artifact is not cached yet
+        is_complete = command.is_cached()
+        if not is_complete:
+            run_response = DbtCloudRunGetCommand(
+                api_token=command.api_token,
+                dbt_cloud_host=command.dbt_cloud_host,
+                account_id=command.account_id,
+                run_id=command.run_id,
+            ).execute()
+            if run_response.status_code == 200:
+                is_complete = run_response.json()["data"].get("is_complete", False)
+        command = command.copy(update={"is_complete": is_complete})
     response = command.execute()
     file.write(response.content)
     response.raise_for_status()
@@ -377,23 +537,26 @@ def get(**kwargs):
 
 @project.command(help=DbtCloudProjectListCommand.get_description())
 @DbtCloudProjectListCommand.click_options
-def list(**kwargs):
+@add_options(output_option)
+def list(output, **kwargs):
     command = DbtCloudProjectListCommand.from_click_options(**kwargs)
-    response = execute_and_print(command)
+    response = execute_and_print(command, output=output)
 
 
 @environment.command(help=DbtCloudEnvironmentListCommand.get_description())
 @DbtCloudEnvironmentListCommand.click_options
-def list(**kwargs):
+@add_options(output_option)
+def list(output, **kwargs):
     command = DbtCloudEnvironmentListCommand.from_click_options(**kwargs)
-    response = execute_and_print(command)
+    response = execute_and_print(command, output=output)
 
 
 @account.command(help=DbtCloudAccountListCommand.get_description())
 @DbtCloudAccountListCommand.click_options
-def list(**kwargs):
+@add_options(output_option)
+def list(output, **kwargs):
     command = DbtCloudAccountListCommand.from_click_options(**kwargs)
-    response = execute_and_print(command)
+    response = execute_and_print(command, output=output)
 
 
 @account.command(help=DbtCloudAccountGetCommand.get_description())
@@ -405,9 +568,10 @@ def get(**kwargs):
 
 @audit_log.command(help=DbtCloudAuditLogGetCommand.get_description())
 @DbtCloudAuditLogGetCommand.click_options
-def get(**kwargs):
+@add_options(output_option)
+def get(output, **kwargs):
     command = DbtCloudAuditLogGetCommand.from_click_options(**kwargs)
-    response = execute_and_print(command)
+    response = execute_and_print(command, output=output)
 
 
 @metadata.command(help=DbtCloudMetadataQueryCommand.get_description())
@@ -437,9 +601,47 @@ def version():
     print(__version__)
 
 
+@dbt_cloud.command(short_help='Run a daemon that executes CLI commands with a warm start.')
+@click.option(
+    "--socket",
+    "socket_path",
+    default=None,
+    type=click.Path(dir_okay=False),
+    help="Unix socket to listen on (default: DBT_CLOUD_DAEMON_SOCKET environment variable or ~/.cache/dbt-cloud/daemon.sock)",
+)
+def serve(socket_path):
+    """Runs a long-lived daemon on a Unix socket. While it is running, `dbt-cloud`
+    forwards commands to it instead of starting the CLI from scratch."""
+    import signal
+    from dbt_cloud import daemon
+
+    if not daemon.DAEMON_SUPPORTED:
+        raise DbtCloudException(
+            "dbt-cloud serve requires fork and Unix sockets, which this platform does not support"
+        )
+
+    daemon.preload()
+    try:
+        server = daemon.DaemonServer(socket_path)
+    except OSError as e:
+        raise DbtCloudException(str(e))
+
+    # Exit cleanly on SIGTERM as well so that the socket is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(EC_OK))
+    click.echo(f"Listening on {server.socket_path}", err=True)
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
 @dbt_cloud.command(short_help='Check project configuration.')
 @add_options(debug_option)
 def diagnose(**kwargs):
+    from dbt_cloud.configuration import Configuration
+
+    console = get_console()
     console.print('Diagnosing')
     console.print(f'[bold dark_orange]Package Version:[/bold dark_orange] {__version__}')
 
@@ -453,24 +655,38 @@ def diagnose(**kwargs):
 @click.option("--job-id", default=None, type=click.INT, help="Job ID")
 @click.option("--sample", default=10, type=click.INT, help="Change API limit size")
 @click.option("--upload", is_flag=True, default=None, type=click.BOOL, help="Enable upload to server")
+@click.option("--concurrency", default=4, type=click.IntRange(min=1), help="Number of runs and artifacts fetched in parallel")
+@click.option("--incremental", is_flag=True, default=False, help="Collect every run newer than the last collected run of each job (.artifacts/state.json) instead of the latest --sample runs")
+@click.option("--no-cache", is_flag=True, default=False, help="Always download artifacts instead of reading them from the local artifact cache")
+@click.option("--no-store", is_flag=True, default=False, help="Don't append the collected metrics to the local metric store (.artifacts/metrics.db)")
+@click.option("--format", "output_format", type=click.Choice(["json", "parquet"]), default="json", help="Format of the node metrics file: .artifacts/metric.json or .artifacts/metric.parquet (requires the 'parquet' extra)")
 @add_options(debug_option)
 def collect(**kwargs):
+    from dbt_cloud.configuration import Configuration
+    from dbt_cloud.collect import Collector
+
     account_id = kwargs.get('account_id')
     job_id = kwargs.get("job_id")
     sample = kwargs.get("sample")
     debug = kwargs.get("debug")
     upload = kwargs.get("upload")
+    concurrency = kwargs.get("concurrency")
+    incremental = kwargs.get("incremental")
+    no_cache = kwargs.get("no_cache")
+    output_format = kwargs.get("output_format")
+    no_store = kwargs.get("no_store")
 
     configurator = Configuration.load()
     credential = Configuration.load_credentials()
-    collector = Collector(configurator=configurator, limit=sample, datasource=credential)
-    collector.collect(debug=debug, upload=upload, job_id=job_id)
+    collector = Collector(configurator=configurator, limit=sample, datasource=credential, concurrency=concurrency, no_cache=no_cache)
+    collector.collect(debug=debug, upload=upload, job_id=job_id, incremental=incremental, output_format=output_format, store=not no_store)
 
 @dbt_cloud.command(short_help='Initialise collect')
 @add_options(debug_option)
 def init(**kwargs):
     'Initialize a collect job. The results are saved in project root folder.'
-    console = Console()
+    from dbt_cloud.initializer import Initializer
+
     Initializer.exec()
 
 
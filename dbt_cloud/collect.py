@@ -1,30 +1,47 @@
-from typing import List, Any
+import os
+import gzip
+import shutil
+import tempfile
+import uuid
+from contextlib import ExitStack
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Any, Optional
 
+import ijson
 from rich.console import Console
 import requests
+from sqlalchemy import text
 
-from dbt_cloud import write_to_file
+from dbt_cloud import JsonArrayWriter, ParquetMetricWriter, get_run_results_path
+from dbt_cloud.command.command import DbtCloudCommand
 from dbt_cloud.command.job.list import DbtCloudJobListCommand
 from dbt_cloud.command.run.list import DbtCloudRunListCommand
 from dbt_cloud.command.run.get_artifact import DbtCloudRunGetArtifactCommand
 from dbt_cloud.datasource import SnowflakeConnector
 from dbt_cloud.configuration import Configuration
+from dbt_cloud.field import get_env
+from dbt_cloud.serde import dict_to_ndjson
+from dbt_cloud.state import CollectorState
+from dbt_cloud.store import MetricStore
 
 console = Console()
 URL = "http://127.0.0.1:5000/metric/operational"
+BULK_URL = "http://127.0.0.1:5000/metric/operational/bulk"
 PING= "http://127.0.0.1:5000/metric/ping"
 
 class Collector(object):
-    def __init__(self, configurator: Configuration, limit: int = 5, datasource=None) -> None:
+    def __init__(self, configurator: Configuration, limit: int = 5, datasource=None, concurrency: int = 4, no_cache: bool = False) -> None:
         self.configurator=configurator
         self.limit = limit
         self.api_url = URL
+        self.bulk_api_url = BULK_URL
         self.datasource = datasource
+        self.concurrency = max(concurrency, 1)
+        self.no_cache = no_cache
     
-    def collect(self, debug=False, upload=False, job_id=None, archive=True) -> List[Any]:
+    def collect(self, debug=False, upload=False, job_id=None, archive=True, incremental=False, output_format='json', store=True) -> List[Any]:
         tracking_jobs = [job for job in self.configurator.jobs if job.tracking]
         payloads = []
-        raw_artifacts = []
         if debug:
             console.print(tracking_jobs)
         if job_id:
@@ -37,126 +54,268 @@ class Collector(object):
         if len(selected_jobs) == 0:
             console.print("No job found")
         else:
-            for job in selected_jobs:
-                job_id = job.job_id
-                job_name = job.name
-                project_id = job.project_id
-
-                res = DbtCloudRunListCommand(
-                    project_id=project_id,
-                    job_id=job_id,
-                    limit=self.limit,
-                    order_by='-created_at'
-                ).execute().json()
-            
-                jobruns = res.get("data", [])
-                console.print(f"Fetched {len(jobruns)} runs for job id {job_id}")
-
-                for idx, run in enumerate(jobruns):
-
-                    run_id = run.get("id")
-                    res=DbtCloudRunGetArtifactCommand(
-                        run_id=run_id,
-                        path="run_results.json"
-                    ).execute()
-
-                    if res.status_code == 200:
-                        data = res.json()
-                        raw_artifacts.append(data)
-                        dbt_version = data.get("metadata").get("dbt_version")
-                        collected_at = data.get("metadata").get("generated_at")
-                        nodes = data.get("results", [])
-
-                        metrics = [
-                            {
-                                "unique_id": node.get("unique_id"), 
-                                "job_id": job_id,
-                                "job_name": job_name,
-                                "run_id": run_id,
-                                "dbt_version": dbt_version,
-                                "execution_time": node.get("execution_time"),
-                                "affected_rows": node.get("adapter_response").get("rows_affected"),
-                                "status": node.get("status"),
-                                "collected_at": collected_at
-                            } 
-                            for node in nodes
+            state = CollectorState.load() if incremental else None
+            run_results_paths = []
+            metric_writer = ParquetMetricWriter() if output_format == 'parquet' else JsonArrayWriter('metric.json')
+            # Metrics are also appended to the local metric store, which keeps the history
+            writers = [metric_writer, MetricStore()] if store else [metric_writer]
+            with tempfile.TemporaryDirectory() as download_dir, ExitStack() as stack:
+                for writer in writers:
+                    stack.enter_context(writer)
+                with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                    # Futures are consumed in submission order so that the metric file is deterministic
+                    watermarks = [state.get_watermark(job.job_id) if state is not None else None for job in selected_jobs]
+                    jobruns_by_job = list(executor.map(self.list_runs, selected_jobs, watermarks))
+                    if state is not None:
+                        jobruns_by_job = [
+                            state.filter_new_runs(job.job_id, jobruns)
+                            for job, jobruns in zip(selected_jobs, jobruns_by_job)
                         ]
-                        console.print(f"{idx+1}/{len(jobruns)} found {len(metrics)} nodes")
-                        payloads.append({
-                            "project": "svp",
-                            "run_id": run_id,
-                            "metrics": metrics,
-                            "generated_at": collected_at
-                        })
-                    else:
-                        console.print(f"{idx+1}/{len(jobruns)} artifacts not found. Run Id {run_id}")
+                    artifact_futures_by_job = [
+                        [
+                            executor.submit(self.fetch_run_results, run.get("id"), download_dir, run.get("is_complete", False))
+                            for run in jobruns
+                        ]
+                        for jobruns in jobruns_by_job
+                    ]
+
+                    for job, jobruns, artifact_futures in zip(selected_jobs, jobruns_by_job, artifact_futures_by_job):
+                        console.print(f"Fetched {len(jobruns)} runs for job id {job.job_id}")
+                        failed_run_ids = set()
+
+                        for idx, (run, future) in enumerate(zip(jobruns, artifact_futures)):
+                            run_id = run.get("id")
+                            try:
+                                artifact_path = future.result()
+                            except requests.RequestException as e:
+                                console.print(f"{idx+1}/{len(jobruns)} failed to fetch artifacts. Run Id {run_id}: {e}")
+                                failed_run_ids.add(run_id)
+                                continue
+
+                            if artifact_path is not None:
+                                payload = self.build_payload_from_file(job, run_id, artifact_path)
+                                run_results_paths.append(self.store_run_results(job, run_id, artifact_path))
+                                for writer in writers:
+                                    writer.write(payload)
+                                console.print(f"{idx+1}/{len(jobruns)} found {len(payload['metrics'])} nodes")
+                                if upload:
+                                    payloads.append(payload)
+                            else:
+                                console.print(f"{idx+1}/{len(jobruns)} artifacts not found. Run Id {run_id}")
+
+                        if state is not None:
+                            state.advance(job.job_id, jobruns, failed_run_ids=failed_run_ids)
                         
+            uploaded = True
             if upload:
                 console.print("Uploading report...")
-                self.upload(payloads)
+                uploaded = self.upload(payloads)
 
-            filepath = write_to_file(data=payloads, name='metric.json')
-            rawfilepath = write_to_file(data=raw_artifacts, name='run_results.json')
-            self.archive([rawfilepath])
-                      
-    def upload(self, json:List) -> requests.Response:
+            if archive:
+                self.archive(run_results_paths)
+            if state is not None:
+                if uploaded:
+                    state.save()
+                else:
+                    # Otherwise the runs that failed to upload would never be collected again
+                    console.print("Upload failed, the runs will be collected again on the next invocation")
 
-        request_headers = {
-            "Content": "application/json"            
+    def list_runs(self, job, watermark: Optional[int] = None) -> List[dict]:
+        """Returns the latest `limit` runs of a job, most recent first. Given the watermark of
+        an incremental collection, returns every run after it instead, however many there
+        are, so that no run is skipped."""
+        command = DbtCloudRunListCommand(
+            project_id=job.project_id,
+            job_id=job.job_id,
+            limit=self.limit,
+            order_by='-created_at'
+        )
+        if watermark is None:
+            return command.execute().json().get("data", [])
+
+        runs = []
+        # Pages are fetched lazily, so listing stops at the page that reaches the watermark
+        for run in command.copy(update={"order_by": "-id"}).iter_items():
+            if run.get("id") <= watermark:
+                break
+            runs.append(run)
+        return runs
+
+    def fetch_run_results(self, run_id, directory: str, is_complete: bool = False) -> Optional[str]:
+        """Downloads run_results.json of a run into directory and returns the file path,
+        or None if the artifact was not found. Other HTTP errors are raised. The artifact
+        is only cached when the run is complete."""
+        filepath = os.path.join(directory, f"{run_id}.json")
+        with open(filepath, 'wb') as f:
+            res = DbtCloudRunGetArtifactCommand(
+                run_id=run_id,
+                path="run_results.json",
+                no_cache=self.no_cache,
+                is_complete=is_complete,
+            ).download(f)
+        if res.status_code == 200:
+            return filepath
+        os.remove(filepath)
+        if res.status_code != 404:
+            res.raise_for_status()
+        return None
+
+    @staticmethod
+    def store_run_results(job, run_id, filepath: str) -> str:
+        """Moves a downloaded run_results.json into its gzip'd per-run file and returns the
+        new path."""
+        run_results_path = get_run_results_path(job.job_id, run_id)
+        with open(filepath, 'rb') as src, gzip.open(run_results_path, 'wb', compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(filepath)
+        return run_results_path
+
+    @classmethod
+    def build_payload_from_file(cls, job, run_id, filepath: str) -> dict:
+        """Builds the metric payload of a run_results.json file parsing one node at a time."""
+        with open(filepath, 'rb') as f:
+            metadata = next(ijson.items(f, 'metadata', use_float=True), {})
+            f.seek(0)
+            nodes = ijson.items(f, 'results.item', use_float=True)
+            return cls.build_payload(job, run_id, {"metadata": metadata, "results": nodes})
+
+    @staticmethod
+    def build_payload(job, run_id, data: dict) -> dict:
+        dbt_version = data.get("metadata").get("dbt_version")
+        collected_at = data.get("metadata").get("generated_at")
+        nodes = data.get("results", [])
+
+        metrics = [
+            {
+                "unique_id": node.get("unique_id"), 
+                "job_id": job.job_id,
+                "job_name": job.name,
+                "run_id": run_id,
+                "dbt_version": dbt_version,
+                "execution_time": node.get("execution_time"),
+                "affected_rows": node.get("adapter_response").get("rows_affected"),
+                "status": node.get("status"),
+                "collected_at": collected_at
+            } 
+            for node in nodes
+        ]
+        return {
+            "project": "svp",
+            "run_id": run_id,
+            "metrics": metrics,
+            "generated_at": collected_at
         }
+                      
+    def upload(self, json:List) -> bool:
+        """Uploads run payloads to the bulk endpoint in gzip'd batches of at most
+        DBT_CLOUD_UPLOAD_BATCH_SIZE_MB of JSON each, on the shared connection pool. Returns
+        whether every payload was uploaded."""
 
         if not isinstance(json, List):
             raise Exception("Payload should be a list")
-        
-        try:
-            ping = requests.post(
-                url=PING,
-                headers=request_headers
-            )
 
-            if not ping.status_code != 200:
+        session = DbtCloudCommand.get_session()
+        max_bytes = int(float(get_env("DBT_CLOUD_UPLOAD_BATCH_SIZE_MB", default=8)) * 1024 * 1024)
+        request_headers = {
+            "Content-Type": "application/json",
+            "Content-Encoding": "gzip",
+        }
+        try:
+            ping = session.get(url=PING)
+            if ping.status_code != 200:
                 console.print('Cloud API is down')
-            else:
-                for j in json:
-                    response = requests.post(
-                        url=self.api_url, 
-                        headers=request_headers, 
-                        json=j
-                    )
-                    if response.status_code == 200:
-                        console.print(f"Results uploaded to {self.api_url}")
-                return response
+                return False
+
+            responses = []
+            uploaded = inserted = failed = 0
+            for count, body in iter_upload_batches(json, max_bytes):
+                response = session.post(
+                    url=self.bulk_api_url,
+                    headers=request_headers,
+                    data=gzip.compress(body)
+                )
+                responses.append(response)
+                if response.status_code == 200:
+                    uploaded += count
+                    inserted += response.json().get("inserted", 0)
+                else:
+                    failed += count
+                    console.print(f"Failed to upload {count} runs: {response.status_code} {response.text}")
+            console.print(f"Uploaded {uploaded} runs ({inserted} metrics) to {self.bulk_api_url} in {len(responses)} requests")
+            if failed:
+                console.print(f"{failed} runs failed to upload")
+            return failed == 0
         except requests.exceptions.ConnectionError:
             console.print('Cloud API endpoint is not connected')
-    
+            return False
+
     def archive(self, filepath=[]) -> None:
+        """Loads artifact files into src_dbt_artifacts with one PUT and one COPY INTO.
+
+        The files are gathered in one directory and uploaded together (gzip'd, in parallel)
+        under a stage prefix unique to this call. COPY INTO then only reads that prefix,
+        and the prefix is removed once the files are loaded."""
+        if not filepath:
+            return
         db = SnowflakeConnector(self.datasource)
+        prefix = f"{db.stage}/collect/{uuid.uuid4().hex}/"
         try:
-            engine = db.create_engine()
-            with engine.connect() as connection:
-                for fp in filepath:
-                    clmt = f"remove @{db.stage} pattern='.*.json.gz';"
-                    ptmt = f"put file://{fp} @{db.stage} auto_compress=true;"
-                    cpmt = f"""
-                    copy into {db.database}.{db.schema}.src_dbt_artifacts from
-                        (
-                            select
-                            $1 as data,
-                            $1:metadata:generated_at::timestamp_ntz as generated_at,
-                            metadata$filename as path,
-                            regexp_substr(metadata$filename, '([a-z_]+.json)') as artifact_type
-                            from  @{db.stage}
-                        )
-                    file_format=(type='JSON')
-                    on_error='skip_file';
-                    """
-                    connection.execute(clmt)
-                    connection.execute(ptmt)
-                    connection.execute(cpmt)
-                    console.print()
+            with tempfile.TemporaryDirectory() as upload_dir:
+                for idx, fp in enumerate(filepath):
+                    name = os.path.basename(fp)
+                    if os.path.exists(os.path.join(upload_dir, name)):
+                        name = f"{idx}-{name}"
+                    link_or_copy(fp, os.path.join(upload_dir, name))
+
+                ptmt = f"put 'file://{upload_dir}/*' @{prefix} parallel={self.concurrency} auto_compress=true;"
+                cpmt = f"""
+                copy into {db.database}.{db.schema}.src_dbt_artifacts from
+                    (
+                        select
+                        $1 as data,
+                        $1:metadata:generated_at::timestamp_ntz as generated_at,
+                        metadata$filename as path,
+                        regexp_substr(metadata$filename, '([a-z_]+.json)') as artifact_type
+                        from  @{prefix}
+                    )
+                file_format=(type='JSON')
+                on_error='skip_file';
+                """
+                clmt = f"remove @{prefix};"
+                engine = db.create_engine()
+                with engine.begin() as connection:
+                    connection.execute(text(ptmt))
+                    connection.execute(text(cpmt))
+                    connection.execute(text(clmt))
+                console.print(f"Archived {len(filepath)} files to {db.database}.{db.schema}.src_dbt_artifacts")
         except FileNotFoundError as e:
             console.print(e)
-  
+
+
+def iter_upload_batches(payloads: List[dict], max_bytes: int):
+    """Groups payloads into JSON arrays of at most max_bytes and yields (count, body)
+    tuples. A payload larger than max_bytes is sent in a batch of its own."""
+    batch = []
+    size = 2  # brackets
+    for payload in payloads:
+        item = dict_to_ndjson(payload).encode()
+        if batch and size + len(item) + 1 > max_bytes:
+            yield len(batch), b'[' + b','.join(batch) + b']'
+            batch = []
+            size = 2
+        size += len(item) + (1 if batch else 0)
+        batch.append(item)
+    if batch:
+        yield len(batch), b'[' + b','.join(batch) + b']'
+
+
+def link_or_copy(src: str, dst: str) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
 if __name__ == '__main__':
     configuration = Configuration.load()
 
@@ -1,4 +1,3 @@
-import requests
 from dbt_cloud.command.command import DbtCloudCommand
 
 
@@ -8,7 +7,3 @@ class DbtCloudAccountListCommand(DbtCloudCommand):
     @property
     def api_url(self) -> str:
         return f"{super().api_url}/accounts/"
-
-    def execute(self) -> requests.Response:
-        response = requests.get(url=self.api_url, headers=self.request_headers)
-        return response
@@ -1,10 +1,12 @@
-import requests
 from typing import Optional
 from pydantic import Field, PrivateAttr
-from dbt_cloud.command.command import DbtCloudAccountCommand
+from dbt_cloud.command.command import (
+    DbtCloudAccountCommand,
+    DbtCloudPaginatedCommandMixin,
+)
 
 
-class DbtCloudAuditLogGetCommand(DbtCloudAccountCommand):
+class DbtCloudAuditLogGetCommand(DbtCloudPaginatedCommandMixin, DbtCloudAccountCommand):
     """Retrieves audit logs for the dbt Cloud account."""
 
     logged_at_start: Optional[str] = Field(
@@ -29,12 +31,10 @@ class DbtCloudAuditLogGetCommand(DbtCloudAccountCommand):
     def api_url(self) -> str:
         return f"{super().api_url}/audit-logs/"
 
-    def execute(self) -> requests.Response:
-        response = requests.get(
-            url=self.api_url,
-            headers=self.request_headers,
-            params=self.get_payload(
+    def get_request(self, pagination_token: str = None) -> dict:
+        return {
+            **super().get_request(pagination_token=pagination_token),
+            "params": self.get_payload(
                 exclude=["api_token", "dbt_cloud_host", "account_id"]
             ),
-        )
-        return response
+        }
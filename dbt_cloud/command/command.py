@@ -1,9 +1,25 @@
+import asyncio
+import threading
+import time
+import weakref
 import click
-from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from typing import ClassVar, Iterator, Optional
 from mergedeep import merge
 from pydantic import validator, BaseModel, PrivateAttr
 from dbt_cloud.serde import json_to_dict
-from dbt_cloud.field import API_TOKEN_FIELD, ACCOUNT_ID_FIELD, DBT_CLOUD_HOST_FIELD
+from dbt_cloud.retry import RetryPolicy, TokenBucket
+from dbt_cloud.field import (
+    API_TOKEN_FIELD,
+    ACCOUNT_ID_FIELD,
+    DBT_CLOUD_HOST_FIELD,
+    get_env,
+)
 
 
 def translate_click_options(**kwargs) -> dict:
@@ -19,57 +35,66 @@ def translate_click_options(**kwargs) -> dict:
     return kwargs_translated
 
 
-class ClickBaseModel(BaseModel):
-    @classmethod
-    def click_options(cls, function, key_prefix: str = ""):
-        for key, field in reversed(OrderedDict(cls.__fields__).items()):
-            try:
-                is_nested_object = issubclass(field.type_, BaseModel)
-            except TypeError:
-                is_nested_object = False
+@lru_cache(maxsize=None)
+def get_click_option_specs(model, key_prefix: str = "") -> tuple:
+    """Reflects the fields of a model (recursing into nested models) into
+    (param_decls, option_kwargs) pairs, in the order they should be applied as decorators.
+    Memoised per model and prefix, so each model is only reflected once per process."""
+    specs = []
+    for key, field in reversed(OrderedDict(model.__fields__).items()):
+        try:
+            is_nested_object = issubclass(field.type_, BaseModel)
+        except TypeError:
+            is_nested_object = False
+
+        if is_nested_object:
+            specs.extend(
+                get_click_option_specs(
+                    field.type_, key_prefix=f"{key_prefix}__{key}".strip("_")
+                )
+            )
+        else:
+            if (
+                field.field_info.extra.get("exclude_from_click_options", False)
+                or field.field_info.const
+            ):
+                continue
+            help = field.field_info.description or ""
+            kwarg_name = f"{key_prefix}__{key}".strip("_")
+            key = kwarg_name.replace("__", "-").replace("_", "-")
+
+            click_cls = field.field_info.extra.get("click_cls")
+            override_cls = click_cls is not None
 
-            if is_nested_object:
-                function = field.type_.click_options(
-                    function, key_prefix=f"{key_prefix}__{key}".strip("_")
+            try:
+                is_list_arg = (
+                    issubclass(field.outer_type_.__origin__, list) and not override_cls
                 )
+            except AttributeError:
+                is_list_arg = False
+
+            option_kwargs = {
+                "required": field.required,
+                "default": field.default,
+                "multiple": is_list_arg,
+                "is_flag": field.field_info.extra.get("is_flag", False),
+                "help": help,
+            }
+            if override_cls:
+                option_kwargs["cls"] = click_cls
             else:
-                if (
-                    field.field_info.extra.get("exclude_from_click_options", False)
-                    or field.field_info.const
-                ):
-                    continue
-                help = field.field_info.description or ""
-                kwarg_name = f"{key_prefix}__{key}".strip("_")
-                key = kwarg_name.replace("__", "-").replace("_", "-")
-
-                cls = field.field_info.extra.get("click_cls")
-                override_cls = cls is not None
-
-                try:
-                    is_list_arg = (
-                        issubclass(field.outer_type_.__origin__, list)
-                        and not override_cls
-                    )
-                except AttributeError:
-                    is_list_arg = False
-
-                option_kwargs = {
-                    "required": field.required,
-                    "default": field.default,
-                    "multiple": is_list_arg,
-                    "is_flag": field.field_info.extra.get("is_flag", False),
-                    "help": help,
-                }
-                if override_cls:
-                    option_kwargs["cls"] = cls
-                else:
-                    option_kwargs["type"] = field.type_
-
-                function = click.option(
-                    f"--{key}",
-                    kwarg_name,
-                    **option_kwargs,
-                )(function)
+                option_kwargs["type"] = field.type_
+
+            specs.append(((f"--{key}", kwarg_name), option_kwargs))
+    return tuple(specs)
+
+
+class ClickBaseModel(BaseModel):
+    @classmethod
+    def click_options(cls, function, key_prefix: str = ""):
+        for param_decls, option_kwargs in get_click_option_specs(cls, key_prefix):
+            # click.option pops "cls" from its kwargs, so never hand it the cached dict
+            function = click.option(*param_decls, **dict(option_kwargs))(function)
         return function
 
     @validator("*", pre=True)
@@ -91,10 +116,206 @@ class ClickBaseModel(BaseModel):
         return cls.__doc__.strip()
 
 
+def create_session(
+    pool_connections: int = None, pool_maxsize: int = None
+) -> requests.Session:
+    """Creates a keep-alive session with a connection pool mounted for HTTP(S).
+
+    Pool sizes default to the DBT_CLOUD_POOL_CONNECTIONS (number of hosts to keep
+    pools for) and DBT_CLOUD_POOL_MAXSIZE (connections kept per host) environment
+    variables.
+    """
+    if pool_connections is None:
+        pool_connections = int(get_env("DBT_CLOUD_POOL_CONNECTIONS", default=10))
+    if pool_maxsize is None:
+        pool_maxsize = int(get_env("DBT_CLOUD_POOL_MAXSIZE", default=10))
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def create_async_client(max_connections: int = None):
+    """Creates an httpx.AsyncClient for execute_async (requires the 'async' extra).
+
+    The connection limit defaults to the DBT_CLOUD_POOL_MAXSIZE environment variable.
+    """
+    import httpx
+
+    if max_connections is None:
+        max_connections = int(get_env("DBT_CLOUD_POOL_MAXSIZE", default=10))
+    limits = httpx.Limits(
+        max_connections=max_connections, max_keepalive_connections=max_connections
+    )
+    return httpx.AsyncClient(limits=limits)
+
+
+def _drop_none(value: Optional[dict]) -> Optional[dict]:
+    if value is None:
+        return None
+    return {key: item for key, item in value.items() if item is not None}
+
+
 class DbtCloudCommand(ClickBaseModel):
     api_token: str = API_TOKEN_FIELD
     dbt_cloud_host: str = DBT_CLOUD_HOST_FIELD
     _api_version: str = PrivateAttr("v2")
+    _session: ClassVar[Optional[requests.Session]] = None
+    _session_lock: ClassVar[threading.Lock] = threading.Lock()
+    _async_client: ClassVar = None
+    _async_clients: ClassVar[weakref.WeakKeyDictionary] = weakref.WeakKeyDictionary()
+    _retry_policy: ClassVar[Optional[RetryPolicy]] = None
+    _rate_limiter: ClassVar[Optional[TokenBucket]] = None
+    _http_method: str = PrivateAttr("get")
+    # Whether failed requests can be retried. None infers it from the HTTP method.
+    _idempotent: Optional[bool] = PrivateAttr(None)
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """Returns the process-wide session shared by all commands, creating it on first use."""
+        if DbtCloudCommand._session is None:
+            with DbtCloudCommand._session_lock:
+                if DbtCloudCommand._session is None:
+                    DbtCloudCommand._session = create_session()
+        return DbtCloudCommand._session
+
+    @classmethod
+    def set_session(cls, session: Optional[requests.Session]) -> None:
+        """Replaces the shared session (e.g., with a preconfigured one). Passing None resets it."""
+        with DbtCloudCommand._session_lock:
+            DbtCloudCommand._session = session
+
+    @property
+    def session(self) -> requests.Session:
+        return self.get_session()
+
+    @classmethod
+    def get_async_client(cls):
+        """Returns the async client shared by all commands on the running event loop."""
+        if DbtCloudCommand._async_client is not None:
+            return DbtCloudCommand._async_client
+        loop = asyncio.get_running_loop()
+        client = DbtCloudCommand._async_clients.get(loop)
+        if client is None:
+            client = create_async_client()
+            DbtCloudCommand._async_clients[loop] = client
+        return client
+
+    @classmethod
+    def set_async_client(cls, client) -> None:
+        """Uses the given httpx.AsyncClient on every event loop. Passing None resets it."""
+        DbtCloudCommand._async_client = client
+
+    @classmethod
+    async def close_async_client(cls) -> None:
+        """Closes the async client created for the running event loop."""
+        client = DbtCloudCommand._async_clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+    @classmethod
+    def get_retry_policy(cls) -> RetryPolicy:
+        """Returns the retry policy shared by all commands, creating it on first use."""
+        if DbtCloudCommand._retry_policy is None:
+            DbtCloudCommand._retry_policy = RetryPolicy()
+        return DbtCloudCommand._retry_policy
+
+    @classmethod
+    def set_retry_policy(cls, retry_policy: Optional[RetryPolicy]) -> None:
+        """Replaces the shared retry policy. Passing None resets it."""
+        DbtCloudCommand._retry_policy = retry_policy
+
+    @classmethod
+    def get_rate_limiter(cls) -> TokenBucket:
+        """Returns the rate limiter shared by all commands and threads, creating it on first use."""
+        if DbtCloudCommand._rate_limiter is None:
+            with DbtCloudCommand._session_lock:
+                if DbtCloudCommand._rate_limiter is None:
+                    DbtCloudCommand._rate_limiter = TokenBucket()
+        return DbtCloudCommand._rate_limiter
+
+    @classmethod
+    def set_rate_limiter(cls, rate_limiter: Optional[TokenBucket]) -> None:
+        """Replaces the shared rate limiter. Passing None resets it."""
+        DbtCloudCommand._rate_limiter = rate_limiter
+
+    def get_request(self) -> dict:
+        """Returns the keyword arguments of the HTTP request sent by execute."""
+        return {
+            "method": self._http_method,
+            "url": self.api_url,
+            "headers": self.request_headers,
+        }
+
+    def send_request(self, request: dict, **kwargs) -> requests.Response:
+        """Sends a request on the shared session, waiting for the rate limiter and
+        retrying throttled and failed requests according to the retry policy."""
+        retry_policy = self.get_retry_policy()
+        rate_limiter = self.get_rate_limiter()
+        attempt = 0
+        while True:
+            rate_limiter.acquire()
+            try:
+                response = self.session.request(**request, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not retry_policy.should_retry_error(
+                    request["method"], attempt, idempotent=self._idempotent
+                ):
+                    raise
+                time.sleep(retry_policy.get_backoff(attempt))
+                attempt += 1
+                continue
+
+            if not retry_policy.should_retry(
+                request["method"],
+                response.status_code,
+                attempt,
+                idempotent=self._idempotent,
+            ):
+                return response
+            response.close()
+            time.sleep(retry_policy.get_delay(attempt, response.headers))
+            attempt += 1
+
+    def execute(self, **kwargs) -> requests.Response:
+        return self.send_request(self.get_request(**kwargs))
+
+    async def execute_async(self, **kwargs):
+        """Sends the request of execute on the shared async client and returns an httpx.Response."""
+        import httpx
+
+        request = self.get_request(**kwargs)
+        request["headers"] = _drop_none(request["headers"])
+        if "params" in request:
+            request["params"] = _drop_none(request["params"])
+
+        client = self.get_async_client()
+        retry_policy = self.get_retry_policy()
+        rate_limiter = self.get_rate_limiter()
+        attempt = 0
+        while True:
+            await asyncio.sleep(rate_limiter.reserve())
+            try:
+                response = await client.request(**request)
+            except httpx.TransportError:
+                if not retry_policy.should_retry_error(
+                    request["method"], attempt, idempotent=self._idempotent
+                ):
+                    raise
+                await asyncio.sleep(retry_policy.get_backoff(attempt))
+                attempt += 1
+                continue
+
+            if not retry_policy.should_retry(
+                request["method"],
+                response.status_code,
+                attempt,
+                idempotent=self._idempotent,
+            ):
+                return response
+            await asyncio.sleep(retry_policy.get_delay(attempt, response.headers))
+            attempt += 1
 
     @property
     def request_headers(self) -> dict:
@@ -115,3 +336,90 @@ class DbtCloudAccountCommand(DbtCloudCommand):
     @property
     def api_url(self) -> str:
         return f"{super().api_url}/accounts/{self.account_id}"
+
+
+CONTINUATION_TOKEN_HEADER = "x-dbt-continuation-token"
+PAGE_SIZE = 100
+
+
+class DbtCloudPaginatedCommandMixin:
+    """Iterates over every record of a list endpoint that accepts offset and limit
+    parameters. Commands using the mixin declare offset and limit fields and pass
+    pagination_token through get_request."""
+
+    def get_request(self, pagination_token: str = None) -> dict:
+        request = super().get_request()
+        if pagination_token is not None:
+            request["headers"] = {
+                CONTINUATION_TOKEN_HEADER: pagination_token,
+                **request["headers"],
+            }
+        return request
+
+    def fetch_page(
+        self, offset: int, pagination_token: str = None
+    ) -> requests.Response:
+        command = self.copy(update={"offset": offset, "limit": PAGE_SIZE})
+        response = command.execute(pagination_token=pagination_token)
+        response.raise_for_status()
+        return response
+
+    def iter_items(self) -> Iterator[dict]:
+        """Lazily yields every record across pages starting from offset (ignores limit).
+
+        Pages are requested one at a time. A continuation token returned in the
+        x-dbt-continuation-token response header is sent with the next request;
+        otherwise the offset is advanced until the total count is reached.
+        """
+        offset = self.offset or 0
+        pagination_token = None
+        while True:
+            response = self.fetch_page(offset, pagination_token=pagination_token)
+            response_dict = response.json()
+            data = response_dict.get("data") or []
+            yield from data
+
+            offset += len(data)
+            pagination_token = response.headers.get(CONTINUATION_TOKEN_HEADER)
+            pagination = response_dict.get("extra", {}).get("pagination")
+            if not data:
+                break
+            elif pagination_token is not None:
+                continue
+            elif pagination is not None:
+                if offset >= pagination["total_count"]:
+                    break
+            elif len(data) < PAGE_SIZE:
+                break
+
+    def iter_pages(self, max_workers: int = 4) -> Iterator[dict]:
+        """Yields the response of every page in order (ignores limit and offset).
+
+        The first page is fetched on its own to learn the total count. The remaining
+        pages are then fetched concurrently, at most max_workers at a time.
+        """
+
+        def fetch_page_json(offset: int) -> dict:
+            return self.fetch_page(offset).json()
+
+        first_page = fetch_page_json(0)
+        yield first_page
+
+        total_count = first_page["extra"]["pagination"]["total_count"]
+        offsets = iter(range(PAGE_SIZE, total_count, PAGE_SIZE))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = deque(
+                executor.submit(fetch_page_json, offset)
+                for offset in islice(offsets, max_workers)
+            )
+            while futures:
+                page = futures.popleft().result()
+                next_offset = next(offsets, None)
+                if next_offset is not None:
+                    futures.append(executor.submit(fetch_page_json, next_offset))
+                yield page
+
+    def paginate(self, max_workers: int = 4) -> Iterator[dict]:
+        """Yields every record across all pages, fetching pages concurrently."""
+        for page in self.iter_pages(max_workers=max_workers):
+            yield from page["data"]
@@ -1,4 +1,3 @@
-import requests
 from pydantic import Field, PrivateAttr
 from dbt_cloud.command.command import DbtCloudAccountCommand
 from dbt_cloud.field import PROJECT_ID_FIELD
@@ -13,7 +12,3 @@ class DbtCloudEnvironmentListCommand(DbtCloudAccountCommand):
     @property
     def api_url(self) -> str:
         return f"{super().api_url}/projects/{self.project_id}/environments"
-
-    def execute(self) -> requests.Response:
-        response = requests.get(url=self.api_url, headers=self.request_headers)
-        return response
@@ -1,7 +1,6 @@
-import requests
 from enum import Enum
 from typing import Optional, List
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 from dbt_cloud.command.command import DbtCloudAccountCommand, ClickBaseModel
 from dbt_cloud.field import PythonLiteralOption, PROJECT_ID_FIELD, ENVIRONMENT_ID_FIELD
 
@@ -77,13 +76,11 @@ class DbtCloudJobCreateCommand(DbtCloudAccountCommand):
         description="When true, run a dbt docs generate step at the end of runs triggered from this job.",
     )
     schedule: Optional[DbtCloudJobSchedule] = Field(default_factory=DbtCloudJobSchedule)
+    _http_method: str = PrivateAttr("post")
 
     @property
     def api_url(self) -> str:
         return f"{super().api_url}/jobs/"
 
-    def execute(self) -> requests.Response:
-        response = requests.post(
-            url=self.api_url, headers=self.request_headers, json=self.get_payload()
-        )
-        return response
+    def get_request(self) -> dict:
+        return {**super().get_request(), "json": self.get_payload()}
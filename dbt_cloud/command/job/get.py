@@ -1,5 +1,4 @@
 import os
-import requests
 from typing import Optional
 from pydantic import Field
 from dbt_cloud.command.command import DbtCloudAccountCommand
@@ -18,10 +17,5 @@ class DbtCloudJobGetCommand(DbtCloudAccountCommand):
     def api_url(self) -> str:
         return f"{super().api_url}/jobs/{self.job_id}"
 
-    def execute(self) -> requests.Response:
-        response = requests.get(
-            url=self.api_url,
-            headers=self.request_headers,
-            params={"order_by": self.order_by},
-        )
-        return response
+    def get_request(self) -> dict:
+        return {**super().get_request(), "params": {"order_by": self.order_by}}
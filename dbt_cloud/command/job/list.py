@@ -1,25 +1,39 @@
-import requests
 from typing import Optional
 from pydantic import Field
-from dbt_cloud.command.command import DbtCloudAccountCommand
+from dbt_cloud.command.command import (
+    DbtCloudAccountCommand,
+    DbtCloudPaginatedCommandMixin,
+)
 
 
-class DbtCloudJobListCommand(DbtCloudAccountCommand):
+class DbtCloudJobListCommand(DbtCloudPaginatedCommandMixin, DbtCloudAccountCommand):
     """Returns a list of jobs in the account."""
 
     order_by: Optional[str] = Field(
         description="Field to order the result by. Use - to indicate reverse order."
     )
     project_id: Optional[str] = Field(description="Filter jobs by project ID.")
+    offset: Optional[int] = Field(
+        description="Offset for the returned jobs. Must be a positive integer.",
+        ge=0,
+    )
+    limit: Optional[int] = Field(
+        description="A limit on the number of jobs to be returned, between 1 and 100.",
+        ge=1,
+        le=100,
+    )
 
     @property
     def api_url(self) -> str:
         return f"{super().api_url}/jobs"
 
-    def execute(self) -> requests.Response:
-        response = requests.get(
-            url=self.api_url,
-            headers=self.request_headers,
-            params={"order_by": self.order_by, "project_id": self.project_id},
-        )
-        return response
+    def get_request(self, pagination_token: str = None) -> dict:
+        return {
+            **super().get_request(pagination_token=pagination_token),
+            "params": {
+                "order_by": self.order_by,
+                "project_id": self.project_id,
+                "offset": self.offset,
+                "limit": self.limit,
+            },
+        }
@@ -1,6 +1,5 @@
-import requests
 from typing import Optional, List
-from pydantic import Field, validator
+from pydantic import Field, PrivateAttr, validator
 from dbt_cloud.command.command import DbtCloudAccountCommand
 from dbt_cloud.field import JOB_ID_FIELD, PythonLiteralOption
 
@@ -41,6 +40,7 @@ class DbtCloudJobRunCommand(DbtCloudAccountCommand):
         click_cls=PythonLiteralOption,
         description="Override the list of steps for this job",
     )
+    _http_method: str = PrivateAttr("post")
 
     @validator("steps_override")
     def check_steps_override_is_none_if_empty(cls, value):
@@ -50,10 +50,5 @@ class DbtCloudJobRunCommand(DbtCloudAccountCommand):
     def api_url(self) -> str:
         return f"{super().api_url}/jobs/{self.job_id}/run/"
 
-    def execute(self) -> requests.Response:
-        response = requests.post(
-            url=self.api_url,
-            headers=self.request_headers,
-            json=self.get_payload(),
-        )
-        return response
+    def get_request(self) -> dict:
+        return {**super().get_request(), "json": self.get_payload()}
@@ -1,5 +1,4 @@
-import requests
-from pydantic import Field
+from pydantic import Field, PrivateAttr
 from dbt_cloud.command.command import DbtCloudAccountCommand
 
 
@@ -7,6 +6,7 @@ class DbtCloudMetadataQueryCommand(DbtCloudAccountCommand):
     """Queries the dbt Cloud Metadata API using GraphQL."""
 
     query: str = Field(exclude_from_click_options=True)
+    _http_method: str = PrivateAttr("post")
 
     @property
     def request_headers(self):
@@ -16,8 +16,5 @@ class DbtCloudMetadataQueryCommand(DbtCloudAccountCommand):
     def api_url(self) -> str:
         return f"https://metadata.{self.dbt_cloud_host}/graphql"
 
-    def execute(self) -> requests.Response:
-        response = requests.post(
-            url=self.api_url, headers=self.request_headers, json={"query": self.query}
-        )
-        return response
+    def get_request(self) -> dict:
+        return {**super().get_request(), "json": {"query": self.query}}
@@ -1,14 +1,30 @@
-import requests
-from dbt_cloud.command.command import DbtCloudAccountCommand
+from typing import Optional
+from pydantic import Field
+from dbt_cloud.command.command import (
+    DbtCloudAccountCommand,
+    DbtCloudPaginatedCommandMixin,
+)
 
 
-class DbtCloudProjectListCommand(DbtCloudAccountCommand):
+class DbtCloudProjectListCommand(DbtCloudPaginatedCommandMixin, DbtCloudAccountCommand):
     """Returns a list of projects in the account."""
 
+    offset: Optional[int] = Field(
+        description="Offset for the returned projects. Must be a positive integer.",
+        ge=0,
+    )
+    limit: Optional[int] = Field(
+        description="A limit on the number of projects to be returned, between 1 and 100.",
+        ge=1,
+        le=100,
+    )
+
     @property
     def api_url(self) -> str:
         return f"{super().api_url}/projects"
 
-    def execute(self) -> requests.Response:
-        response = requests.get(url=self.api_url, headers=self.request_headers)
-        return response
+    def get_request(self, pagination_token: str = None) -> dict:
+        return {
+            **super().get_request(pagination_token=pagination_token),
+            "params": {"offset": self.offset, "limit": self.limit},
+        }
@@ -1,5 +1,5 @@
-import requests
 from enum import IntEnum
+from pydantic import PrivateAttr
 from dbt_cloud.command.command import DbtCloudAccountCommand
 from dbt_cloud.field import RUN_ID_FIELD
 
@@ -17,11 +17,10 @@ class DbtCloudRunCancelCommand(DbtCloudAccountCommand):
     """Cancels a dbt Cloud run."""
 
     run_id: int = RUN_ID_FIELD
+    _http_method: str = PrivateAttr("post")
+    # Cancelling a run twice has the same effect as cancelling it once
+    _idempotent: bool = PrivateAttr(True)
 
     @property
     def api_url(self) -> str:
         return f"{super().api_url}/runs/{self.run_id}/cancel/"
-
-    def execute(self) -> requests.Response:
-        response = requests.post(url=self.api_url, headers=self.request_headers)
-        return response
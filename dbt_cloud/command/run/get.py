@@ -1,4 +1,3 @@
-import requests
 from enum import IntEnum
 from typing import Optional, List
 from pydantic import Field
@@ -26,7 +25,3 @@ class DbtCloudRunGetCommand(DbtCloudAccountCommand):
     @property
     def api_url(self) -> str:
         return f"{super().api_url}/runs/{self.run_id}"
-
-    def execute(self) -> requests.Response:
-        response = requests.get(url=self.api_url, headers=self.request_headers)
-        return response
@@ -1,8 +1,14 @@
+import shutil
+import threading
 import requests
+from typing import ClassVar, Optional
 from pydantic import Field
+from dbt_cloud.cache import ArtifactCache
 from dbt_cloud.command.command import DbtCloudAccountCommand
 from dbt_cloud.field import RUN_ID_FIELD
 
+CHUNK_SIZE = 1024 * 1024
+
 
 class DbtCloudRunGetArtifactCommand(DbtCloudAccountCommand):
     """Fetches an artifact file from a completed run."""
@@ -16,13 +22,100 @@ class DbtCloudRunGetArtifactCommand(DbtCloudAccountCommand):
         ...,
         description="Paths are rooted at the target/ directory. Use manifest.json, catalog.json, or run_results.json to download dbt-generated artifacts for the run.",
     )
+    no_cache: bool = Field(
+        False,
+        is_flag=True,
+        description="Always download the artifact instead of reading it from the local artifact cache.",
+    )
+    is_complete: bool = Field(
+        False,
+        exclude_from_click_options=True,
+        description="Whether the run is known to be complete. The artifacts of the last step are only cached for complete runs, since they change while the run is in progress.",
+    )
+    _cache: ClassVar[Optional[ArtifactCache]] = None
+    _cache_lock: ClassVar[threading.Lock] = threading.Lock()
+
+    @classmethod
+    def get_cache(cls) -> ArtifactCache:
+        """Returns the artifact cache shared by all commands, creating it on first use."""
+        if DbtCloudRunGetArtifactCommand._cache is None:
+            with DbtCloudRunGetArtifactCommand._cache_lock:
+                if DbtCloudRunGetArtifactCommand._cache is None:
+                    DbtCloudRunGetArtifactCommand._cache = ArtifactCache()
+        return DbtCloudRunGetArtifactCommand._cache
+
+    @classmethod
+    def set_cache(cls, cache: Optional[ArtifactCache]) -> None:
+        """Replaces the shared artifact cache. Passing None resets it."""
+        with DbtCloudRunGetArtifactCommand._cache_lock:
+            DbtCloudRunGetArtifactCommand._cache = cache
 
     @property
     def api_url(self) -> str:
         return f"{super().api_url}/runs/{self.run_id}/artifacts/{self.path}"
 
+    @property
+    def cache_key(self) -> tuple:
+        return (self.account_id, self.run_id, self.step, self.path)
+
+    def get_cache_or_none(self) -> Optional[ArtifactCache]:
+        """Returns the artifact cache, or None if this artifact must not be cached."""
+        if self.no_cache or (self.step is None and not self.is_complete):
+            return None
+        return self.get_cache()
+
+    def is_cached(self) -> bool:
+        """Whether the artifact is in the cache, which only stores the last step of a run
+        once the run is complete."""
+        return self.get_cache().get_path(self.cache_key) is not None
+
+    def get_request(self) -> dict:
+        return {**super().get_request(), "params": {"step": self.step}}
+
+    def _cached_response(self, content: bytes = b"") -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.api_url
+        response._content = content
+        return response
+
     def execute(self) -> requests.Response:
-        response = requests.get(
-            url=self.api_url, headers=self.request_headers, params={"step": self.step}
-        )
+        cache = self.get_cache_or_none()
+        if cache is not None:
+            content = cache.get(self.cache_key)
+            if content is not None:
+                return self._cached_response(content)
+
+        response = super().execute()
+        if cache is not None and response.status_code == 200:
+            cache.put(self.cache_key, response.content)
+        return response
+
+    def download(self, file) -> requests.Response:
+        """Streams the artifact into a binary file object in chunks instead of loading it in
+        memory. The returned response has no content when the artifact was written."""
+        cache = self.get_cache_or_none()
+        if cache is not None:
+            cached_path = cache.get_path(self.cache_key)
+            if cached_path is not None:
+                try:
+                    with open(cached_path, "rb") as f:
+                        shutil.copyfileobj(f, file, CHUNK_SIZE)
+                    return self._cached_response()
+                except FileNotFoundError:
+                    pass
+
+        with self.send_request(self.get_request(), stream=True) as response:
+            if response.status_code != 200:
+                # Read the error body so that it is available after the connection is released
+                response.content
+                return response
+            if cache is None:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    file.write(chunk)
+            else:
+                with cache.writer(self.cache_key) as cache_file:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        file.write(chunk)
+                        cache_file.write(chunk)
         return response
@@ -1,8 +1,11 @@
-import requests
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 from pydantic import Field, PrivateAttr
-from dbt_cloud.command.command import DbtCloudAccountCommand
+from dbt_cloud.command.command import (
+    DbtCloudAccountCommand,
+    DbtCloudPaginatedCommandMixin,
+)
+from dbt_cloud.field import PythonLiteralOption
 
 
 class DbtCloudRunStatus(Enum):
@@ -25,12 +28,16 @@ class DbtCloudRunStatus(Enum):
         return mapping[self]
 
 
-class DbtCloudRunListCommand(DbtCloudAccountCommand):
+class DbtCloudRunListCommand(DbtCloudPaginatedCommandMixin, DbtCloudAccountCommand):
     """Returns a list of runs in the account. The runs are returned sorted by creation date, with the most recent run appearing first."""
 
     job_id: Optional[str] = Field(description="Filter runs by job ID.")
     project_id: Optional[str] = Field(description="Filter runs by project ID.")
     status: Optional[DbtCloudRunStatus] = Field(description="Filter by run status.")
+    run_ids: Optional[List[int]] = Field(
+        click_cls=PythonLiteralOption,
+        description="Filter runs by a list of run IDs.",
+    )
     order_by: Optional[str] = Field(
         description="Field to order the result by. Use '-' to indicate reverse order."
     )
@@ -51,25 +58,26 @@ class DbtCloudRunListCommand(DbtCloudAccountCommand):
     def api_url(self) -> str:
         return f"{super().api_url}/runs"
 
-    def execute(self, pagination_token: str = None) -> requests.Response:
+    def get_request(self, pagination_token: str = None) -> dict:
         if self.status is None:
             status = None
         else:
             status = self.status.as_number()
 
-        response = requests.get(
-            url=self.api_url,
-            headers={
-                "x-dbt-continuation-token": pagination_token,
-                **self.request_headers,
-            },
-            params={
+        if self.run_ids:
+            run_ids = str(self.run_ids)
+        else:
+            run_ids = None
+
+        return {
+            **super().get_request(pagination_token=pagination_token),
+            "params": {
                 "limit": self.limit,
                 "project_id": self.project_id,
                 "job_definition_id": self.job_id,
                 "status": status,
+                "id__in": run_ids,
                 "order_by": self.order_by,
                 "offset": self.offset,
             },
-        )
-        return response
+        }
@@ -1,4 +1,3 @@
-import requests
 from pydantic import Field
 from dbt_cloud.command.command import DbtCloudAccountCommand
 from dbt_cloud.field import RUN_ID_FIELD
@@ -16,7 +15,3 @@ class DbtCloudRunListArtifactsCommand(DbtCloudAccountCommand):
     @property
     def api_url(self) -> str:
         return f"{super().api_url}/runs/{self.run_id}/artifacts"
-
-    def execute(self) -> requests.Response:
-        response = requests.get(url=self.api_url, headers=self.request_headers)
-        return response
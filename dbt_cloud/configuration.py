@@ -6,7 +6,6 @@ from rich.console import Console
 
 from dbt_cloud import safe_load_yaml
 from dbt_cloud.exc import DbtCloudConfigError, DbtCloudException
-from dbt_cloud.datasource import SnowflakeCredentialError
 
 
 DBT_CLOUD_CONFIG_PATH = os.path.join(os.getcwd(), 'job.yml')
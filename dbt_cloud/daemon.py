@@ -0,0 +1,298 @@
+"""Optional long-lived daemon that amortises the startup cost of the CLI.
+
+`dbt-cloud serve` imports the CLI and its heavy dependencies once and listens on a Unix
+socket. The `dbt-cloud` entry point is a thin client: when the socket accepts a connection
+it hands the daemon its arguments, working directory, environment and stdin/stdout/stderr
+file descriptors, and waits for the exit code. Each command runs in a child forked from the
+warm daemon, so it behaves exactly as if it were run in-process. SIGINT, SIGTERM and SIGHUP
+received by the client are relayed to the child, and the child is killed if the client goes
+away. Without a daemon the client falls back to running the CLI in-process.
+
+The daemon requires fork and Unix sockets. On other platforms (e.g. Windows) the CLI always
+runs in-process.
+
+This module is imported on every invocation, so it only uses the standard library.
+"""
+
+import array
+import contextlib
+import importlib
+import json
+import os
+import signal
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import traceback
+from typing import List, Optional
+
+HEADER = struct.Struct("!I")
+STDIO_FDS = (0, 1, 2)
+HANDSHAKE_TIMEOUT = 10
+DAEMON_SUPPORTED = (
+    hasattr(os, "fork")
+    and hasattr(socket, "AF_UNIX")
+    and hasattr(socket, "SCM_RIGHTS")
+    and hasattr(signal, "SIGHUP")
+)
+if DAEMON_SUPPORTED:
+    RELAYED_SIGNALS = (signal.SIGINT, signal.SIGTERM, signal.SIGHUP)
+
+# Imported by the daemon up front so that forked commands do not pay for them. Modules that
+# capture the working directory at import time (e.g. dbt_cloud.configuration) are excluded.
+PRELOAD_MODULES = ["dbt_cloud.datasource", "rich.console", "ruamel.yaml", "ijson"]
+
+
+def default_socket_path() -> str:
+    return os.getenv(
+        "DBT_CLOUD_DAEMON_SOCKET",
+        os.path.join(os.path.expanduser("~"), ".cache", "dbt-cloud", "daemon.sock"),
+    )
+
+
+def _send_message(sock: socket.socket, message: dict) -> None:
+    payload = json.dumps(message).encode()
+    sock.sendall(HEADER.pack(len(payload)) + payload)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> Optional[bytes]:
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def _recv_message(sock: socket.socket) -> Optional[dict]:
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    payload = _recv_exactly(sock, HEADER.unpack(header)[0])
+    return None if payload is None else json.loads(payload)
+
+
+def _send_fds(sock: socket.socket, fds) -> None:
+    sock.sendmsg(
+        [b"\0"], [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array("i", fds))]
+    )
+
+
+def _recv_fds(sock: socket.socket, maxfds: int) -> List[int]:
+    fds = array.array("i")
+    _, ancdata, _, _ = sock.recvmsg(1, socket.CMSG_LEN(maxfds * fds.itemsize))
+    for level, type_, data in ancdata:
+        if level == socket.SOL_SOCKET and type_ == socket.SCM_RIGHTS:
+            fds.frombytes(data[: len(data) - (len(data) % fds.itemsize)])
+    return list(fds)
+
+
+def forward(args: List[str], socket_path: str = None) -> Optional[int]:
+    """Runs the CLI with `args` on the daemon and returns its exit code, or None if no
+    daemon is listening on `socket_path` or the platform does not support it."""
+    if not DAEMON_SUPPORTED:
+        return None
+    socket_path = socket_path or default_socket_path()
+    if not os.path.exists(socket_path):
+        return None
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        try:
+            sock.connect(socket_path)
+        except OSError:
+            # Stale socket left behind by a daemon that is no longer running
+            return None
+
+        for stream in (sys.stdout, sys.stderr):
+            stream.flush()
+        _send_fds(sock, STDIO_FDS)
+        _send_message(sock, {"args": args, "cwd": os.getcwd(), "env": dict(os.environ)})
+        relayed = []
+        with _relay_signals(sock, relayed):
+            response = _recv_message(sock)
+    finally:
+        sock.close()
+
+    if response is None:
+        if relayed:
+            # The command was killed by a relayed signal, report it like a shell does
+            return 128 + relayed[-1]
+        print("dbt-cloud daemon closed the connection unexpectedly", file=sys.stderr)
+        return 1
+    return response["exit_code"]
+
+
+@contextlib.contextmanager
+def _relay_signals(sock: socket.socket, relayed: list):
+    """Relays the signals received by the client to the command running on the daemon
+    while the context is active, and records them in `relayed`."""
+
+    def relay(signum, frame):
+        relayed.append(signum)
+        try:
+            _send_message(sock, {"signal": signum})
+        except OSError:
+            pass
+
+    previous_handlers = {}
+    # Signal handlers can only be installed from the main thread
+    if threading.current_thread() is threading.main_thread():
+        for signum in RELAYED_SIGNALS:
+            previous_handlers[signum] = signal.signal(signum, relay)
+    try:
+        yield
+    finally:
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+
+
+def daemon_is_running(socket_path: str) -> bool:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        return False
+    finally:
+        sock.close()
+    return True
+
+
+def run_cli(args: List[str]) -> int:
+    """Runs the CLI in-process and returns its exit code instead of exiting."""
+    from dbt_cloud.cli import dbt_cloud
+
+    try:
+        dbt_cloud.main(args=args, prog_name="dbt-cloud")
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+if DAEMON_SUPPORTED:
+
+    class DaemonRequestHandler(socketserver.BaseRequestHandler):
+        """Runs a single forwarded command. The server forks before calling the handler, so
+        everything done here (chdir, environment, stdio redirection) only affects the child.
+        """
+
+        def handle(self):
+            # Don't let a client that connects but never sends a command hold the child forever
+            self.request.settimeout(HANDSHAKE_TIMEOUT)
+            try:
+                fds = _recv_fds(self.request, len(STDIO_FDS))
+                request = _recv_message(self.request)
+            except socket.timeout:
+                return
+            if request is None or len(fds) != len(STDIO_FDS):
+                return
+            self.request.settimeout(None)
+
+            # Signals behave as they do in-process, not as the daemon handles them
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGHUP, signal.SIG_DFL)
+            self.done = threading.Event()
+            threading.Thread(target=self.receive_signals, daemon=True).start()
+
+            for stream in (sys.stdout, sys.stderr):
+                stream.flush()
+            for fd, target in zip(fds, STDIO_FDS):
+                os.dup2(fd, target)
+                os.close(fd)
+            # The daemon's own sys streams may not write to fds 0-2 (e.g. when they are wrapped)
+            sys.stdin = open(0, "r", closefd=False)
+            sys.stdout = open(1, "w", closefd=False)
+            sys.stderr = open(2, "w", closefd=False, errors="backslashreplace")
+
+            os.chdir(request["cwd"])
+            os.environ.clear()
+            os.environ.update(request["env"])
+
+            exit_code = run_cli(request["args"])
+            for stream in (sys.stdout, sys.stderr):
+                stream.flush()
+            self.done.set()
+            _send_message(self.request, {"exit_code": exit_code})
+
+        def receive_signals(self):
+            """Delivers the signals relayed by the client to this process. When the client
+            goes away, nobody waits for the command anymore, so it is terminated."""
+            while True:
+                try:
+                    message = _recv_message(self.request)
+                except OSError:
+                    message = None
+                if self.done.is_set():
+                    return
+                if message is None:
+                    os.kill(os.getpid(), signal.SIGTERM)
+                    return
+                if message.get("signal") in RELAYED_SIGNALS:
+                    os.kill(os.getpid(), message["signal"])
+
+    class DaemonServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+        # Commands outlive the daemon, e.g. when it is stopped while a `job run --wait` is running
+        block_on_close = False
+
+        def __init__(self, socket_path: str = None) -> None:
+            self.socket_path = socket_path or default_socket_path()
+            if daemon_is_running(self.socket_path):
+                raise OSError(
+                    f"A dbt-cloud daemon is already listening on {self.socket_path}"
+                )
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            os.makedirs(
+                os.path.dirname(os.path.abspath(self.socket_path)),
+                mode=0o700,
+                exist_ok=True,
+            )
+
+            # Commands run with the client's credentials, so only the owner may connect
+            old_umask = os.umask(0o177)
+            try:
+                super().__init__(self.socket_path, DaemonRequestHandler)
+            finally:
+                os.umask(old_umask)
+
+        def server_close(self):
+            super().server_close()
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+
+
+def preload() -> None:
+    import dbt_cloud.cli  # noqa: F401
+
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass
+
+
+def main():
+    """Entry point of the `dbt-cloud` script."""
+    args = sys.argv[1:]
+    exit_code = None
+    if (
+        DAEMON_SUPPORTED
+        and args[:1] != ["serve"]
+        and os.getenv("DBT_CLOUD_NO_DAEMON") is None
+    ):
+        exit_code = forward(args)
+    if exit_code is None:
+        exit_code = run_cli(args)
+    sys.exit(exit_code)
@@ -1,6 +1,10 @@
 class DbtCloudException(Exception):
     pass
 
+
+class DbtCloudRunTimeoutError(DbtCloudException):
+    pass
+
 class BasicError(Exception):
     """ Base class for piperider errors. """
 
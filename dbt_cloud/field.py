@@ -6,7 +6,7 @@ from pydantic import Field
 
 class PythonLiteralOption(click.Option):
     def type_cast_value(self, ctx, value):
-        if value is None:
+        if value is None or not isinstance(value, str):
             return value
         try:
             return ast.literal_eval(value)
@@ -0,0 +1,128 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from dbt_cloud.field import get_env
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+IDEMPOTENT_METHODS = ("get", "head", "options", "put", "delete")
+
+
+class RetryPolicy(object):
+    """Exponential backoff with full jitter for throttled (429) and failed (5xx) requests.
+
+    429 responses are retried for every HTTP method because the request was not
+    processed. 5xx responses and connection errors are only retried for idempotent
+    methods so that, e.g., a job run is never triggered twice, unless the caller states
+    whether the request is idempotent. A Retry-After response header takes precedence
+    over the computed backoff.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = None,
+        backoff_factor: float = None,
+        max_backoff: float = None,
+    ) -> None:
+        if max_retries is None:
+            max_retries = int(get_env("DBT_CLOUD_MAX_RETRIES", default=5))
+        if backoff_factor is None:
+            backoff_factor = float(get_env("DBT_CLOUD_BACKOFF_FACTOR", default=0.5))
+        if max_backoff is None:
+            max_backoff = float(get_env("DBT_CLOUD_MAX_BACKOFF", default=60))
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+
+    def should_retry(
+        self,
+        method: str,
+        status_code: int,
+        attempt: int,
+        idempotent: Optional[bool] = None,
+    ) -> bool:
+        if attempt >= self.max_retries or status_code not in RETRY_STATUSES:
+            return False
+        return status_code == 429 or is_idempotent(method, idempotent)
+
+    def should_retry_error(
+        self, method: str, attempt: int, idempotent: Optional[bool] = None
+    ) -> bool:
+        return attempt < self.max_retries and is_idempotent(method, idempotent)
+
+    def get_backoff(self, attempt: int) -> float:
+        return random.uniform(
+            0, min(self.max_backoff, self.backoff_factor * (2**attempt))
+        )
+
+    def get_delay(self, attempt: int, headers=None) -> float:
+        retry_after = parse_retry_after((headers or {}).get("Retry-After"))
+        if retry_after is not None:
+            return retry_after
+        return self.get_backoff(attempt)
+
+
+def is_idempotent(method: str, idempotent: Optional[bool] = None) -> bool:
+    """Whether a request can safely be sent again, which is inferred from its method
+    unless `idempotent` is given."""
+    if idempotent is not None:
+        return idempotent
+    return method.lower() in IDEMPOTENT_METHODS
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parses a Retry-After header given either in seconds or as an HTTP date."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class TokenBucket(object):
+    """Thread-safe client-side rate limiter allowing `rate` requests per second with
+    bursts of up to `capacity` requests. A rate of 0 disables limiting."""
+
+    def __init__(self, rate: float = None, capacity: float = None) -> None:
+        if rate is None:
+            rate = float(get_env("DBT_CLOUD_RATE_LIMIT", default=0))
+        if capacity is None:
+            capacity = float(
+                get_env("DBT_CLOUD_RATE_LIMIT_BURST", default=max(rate, 1))
+            )
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns how many seconds the caller has to wait before using it."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
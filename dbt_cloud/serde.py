@@ -5,5 +5,9 @@ def dict_to_json(value: dict) -> str:
     return json.dumps(value, indent=2)
 
 
+def dict_to_ndjson(value: dict) -> str:
+    return json.dumps(value, separators=(",", ":"))
+
+
 def json_to_dict(value: str) -> dict:
     return json.loads(value)
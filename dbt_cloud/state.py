@@ -0,0 +1,60 @@
+import os
+import json
+from typing import Dict, Iterable, Optional
+
+from dbt_cloud import ensure_directory_writable
+
+STATE_FILE = "state.json"
+
+
+def default_state_path() -> str:
+    return os.path.join(os.getcwd(), ".artifacts", STATE_FILE)
+
+
+class CollectorState(object):
+    """High-water marks (last collected run id per job) persisted between collections."""
+
+    def __init__(self, watermarks: Dict[str, int] = None, path: str = None) -> None:
+        self.watermarks = watermarks or {}
+        self.path = path or default_state_path()
+
+    @classmethod
+    def load(cls, path=None):
+        path = path or default_state_path()
+        try:
+            with open(path, "r") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return cls(path=path)
+        return cls(watermarks=state.get("watermarks", {}), path=path)
+
+    def get_watermark(self, job_id) -> Optional[int]:
+        return self.watermarks.get(str(job_id))
+
+    def filter_new_runs(self, job_id, runs: Iterable[dict]) -> list:
+        watermark = self.get_watermark(job_id)
+        if watermark is None:
+            return list(runs)
+        return [run for run in runs if run.get("id") > watermark]
+
+    def advance(
+        self, job_id, runs: Iterable[dict], failed_run_ids: Iterable[int] = ()
+    ) -> None:
+        """Moves the watermark over collected runs, stopping at the oldest run that is still in
+        progress or failed to be fetched so that it is collected again on the next invocation.
+        """
+        watermark = self.get_watermark(job_id)
+        failed_run_ids = set(failed_run_ids)
+        for run in sorted(runs, key=lambda run: run.get("id")):
+            if not run.get("is_complete", True) or run.get("id") in failed_run_ids:
+                break
+            if watermark is None or run.get("id") > watermark:
+                watermark = run.get("id")
+        if watermark is not None:
+            self.watermarks[str(job_id)] = watermark
+
+    def save(self) -> str:
+        ensure_directory_writable(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write(json.dumps({"watermarks": self.watermarks}, indent=2))
+        return self.path
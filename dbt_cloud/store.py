@@ -0,0 +1,104 @@
+import os
+import sqlite3
+from typing import List, Optional
+
+from dbt_cloud import ensure_directory_writable
+from dbt_cloud.field import get_env
+
+STORE_FILE = "metrics.db"
+
+COLUMNS = [
+    "unique_id",
+    "job_id",
+    "job_name",
+    "run_id",
+    "dbt_version",
+    "execution_time",
+    "affected_rows",
+    "status",
+    "collected_at",
+]
+
+SCHEMA = """
+create table if not exists node_metric (
+    unique_id text not null,
+    job_id integer not null,
+    job_name text,
+    run_id integer not null,
+    dbt_version text,
+    execution_time real,
+    affected_rows integer,
+    status text,
+    collected_at text
+);
+-- Also serves lookups by (job_id, run_id), and makes collecting a run again idempotent
+create unique index if not exists node_metric_job_run on node_metric (job_id, run_id, unique_id);
+create index if not exists node_metric_node_time on node_metric (unique_id, collected_at);
+"""
+
+
+def default_store_path() -> str:
+    return get_env(
+        "DBT_CLOUD_METRICS_DB",
+        default=os.path.join(os.getcwd(), ".artifacts", STORE_FILE),
+    )
+
+
+class MetricStore(object):
+    """Local SQLite database that accumulates the node metrics of every collection.
+
+    Metrics are keyed by (job_id, run_id, unique_id), so collecting a run again replaces
+    its rows instead of duplicating them. collected_at is stored as an ISO 8601 string,
+    which sorts chronologically.
+    """
+
+    def __init__(self, path: str = None) -> None:
+        self.path = path or default_store_path()
+        self._connection = None
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def open(self) -> None:
+        ensure_directory_writable(os.path.dirname(os.path.abspath(self.path)))
+        self._connection = sqlite3.connect(self.path)
+        # Readers are not blocked while a collection is being written
+        self._connection.execute("pragma journal_mode=wal")
+        self._connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def write(self, item) -> None:
+        """Stores the metrics of a run payload in one transaction."""
+        metrics = item.get("metrics", [])
+        with self._connection:
+            self._connection.executemany(
+                f"insert or replace into node_metric ({', '.join(COLUMNS)}) "
+                f"values ({', '.join('?' for _ in COLUMNS)})",
+                ([m.get(column) for column in COLUMNS] for m in metrics),
+            )
+
+    def get_node_history(
+        self, unique_id: str, start: Optional[str] = None, end: Optional[str] = None
+    ) -> List[dict]:
+        """Returns the metrics of a node ordered by collected_at, optionally limited to
+        start <= collected_at < end."""
+        query = f"select {', '.join(COLUMNS)} from node_metric where unique_id = ?"
+        params = [unique_id]
+        if start is not None:
+            query += " and collected_at >= ?"
+            params.append(start)
+        if end is not None:
+            query += " and collected_at < ?"
+            params.append(end)
+        query += " order by collected_at, run_id"
+        return [
+            dict(zip(COLUMNS, row)) for row in self._connection.execute(query, params)
+        ]
@@ -0,0 +1,223 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+import requests
+
+from dbt_cloud.command import (
+    DbtCloudJobRunCommand,
+    DbtCloudRunGetCommand,
+    DbtCloudRunListCommand,
+    DbtCloudRunStatus,
+)
+from dbt_cloud.command.command import PAGE_SIZE
+from dbt_cloud.exc import DbtCloudRunTimeoutError
+
+FINISHED_STATUSES = (
+    DbtCloudRunStatus.SUCCESS,
+    DbtCloudRunStatus.ERROR,
+    DbtCloudRunStatus.CANCELLED,
+)
+PENDING_STATUSES = (DbtCloudRunStatus.QUEUED, DbtCloudRunStatus.STARTING)
+
+
+def trigger_run(command: DbtCloudJobRunCommand):
+    try:
+        return command.execute()
+    except requests.RequestException as e:
+        return e
+
+
+def describe_error(response) -> str:
+    if isinstance(response, requests.Response):
+        return f"{response.status_code} {response.reason}: {response.text}"
+    return str(response)
+
+
+class RunWaiter(object):
+    """Waits for dbt Cloud runs to finish.
+
+    The statuses of all unfinished runs are fetched with one runs list request per tick
+    (runs missing from the list response are fetched one by one). Polling is fast while
+    any run is queued or starting and slows down exponentially, up to max_interval,
+    while runs are running.
+    """
+
+    def __init__(
+        self,
+        api_token: str = None,
+        account_id: int = None,
+        dbt_cloud_host: str = None,
+        min_interval: float = 2.0,
+        max_interval: float = 30.0,
+        backoff: float = 1.5,
+        timeout: float = None,
+    ) -> None:
+        self.command_kwargs = {
+            key: value
+            for key, value in dict(
+                api_token=api_token,
+                account_id=account_id,
+                dbt_cloud_host=dbt_cloud_host,
+            ).items()
+            if value is not None
+        }
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+
+    def get_runs(self, run_ids: Iterable[int]) -> Dict[int, dict]:
+        run_ids = sorted(set(run_ids))
+        runs = {}
+        for i in range(0, len(run_ids), PAGE_SIZE):
+            chunk = run_ids[i : i + PAGE_SIZE]
+            command = DbtCloudRunListCommand(
+                **self.command_kwargs, run_ids=chunk, limit=PAGE_SIZE, order_by="-id"
+            )
+            response = command.execute()
+            response.raise_for_status()
+            for run in response.json()["data"]:
+                if int(run["id"]) in chunk:
+                    runs[int(run["id"])] = run
+
+        for run_id in run_ids:
+            if run_id not in runs:
+                command = DbtCloudRunGetCommand(**self.command_kwargs, run_id=run_id)
+                response = command.execute()
+                response.raise_for_status()
+                runs[run_id] = response.json()["data"]
+        return runs
+
+    def next_interval(
+        self, interval: float, statuses: Iterable[DbtCloudRunStatus]
+    ) -> float:
+        if any(status in PENDING_STATUSES for status in statuses):
+            return self.min_interval
+        return min(interval * self.backoff, self.max_interval)
+
+    def poll(
+        self,
+        pending: set,
+        finished: Dict[int, dict],
+        last_statuses: Dict[int, DbtCloudRunStatus],
+        on_status: Optional[Callable[[dict], None]] = None,
+    ) -> List[DbtCloudRunStatus]:
+        """Fetches the pending runs once, moving finished runs from pending to finished.
+        Returns the statuses of the runs that are still pending."""
+        statuses = []
+        for run_id, run in self.get_runs(pending).items():
+            status = DbtCloudRunStatus(run["status"])
+            if last_statuses.get(run_id) != status:
+                last_statuses[run_id] = status
+                if on_status is not None:
+                    on_status(run)
+            if status in FINISHED_STATUSES:
+                finished[run_id] = run
+                pending.discard(run_id)
+            else:
+                statuses.append(status)
+        return statuses
+
+    def sleep(self, interval: float, deadline: Optional[float], pending: set) -> None:
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise DbtCloudRunTimeoutError(
+                    f"Runs {sorted(pending)} did not finish within {self.timeout} seconds."
+                )
+            interval = min(interval, remaining)
+        time.sleep(interval)
+
+    def get_deadline(self) -> Optional[float]:
+        return None if self.timeout is None else time.monotonic() + self.timeout
+
+    def wait(
+        self, run_ids: Iterable[int], on_status: Optional[Callable[[dict], None]] = None
+    ) -> Dict[int, dict]:
+        """Returns the final run dicts by run ID once every run has finished. on_status is
+        called with the run dict whenever the status of a run changes."""
+        pending = set(run_ids)
+        finished = {}
+        last_statuses = {}
+        deadline = self.get_deadline()
+        interval = self.min_interval
+
+        while True:
+            statuses = self.poll(pending, finished, last_statuses, on_status)
+            if not pending:
+                return finished
+            interval = self.next_interval(interval, statuses)
+            self.sleep(interval, deadline, pending)
+
+    def wait_for_run(
+        self, run_id: int, on_status: Optional[Callable[[dict], None]] = None
+    ) -> dict:
+        return self.wait([run_id], on_status=on_status)[run_id]
+
+    def run_jobs(
+        self,
+        commands: List[DbtCloudJobRunCommand],
+        max_in_flight: int = None,
+        on_status: Optional[Callable[[dict], None]] = None,
+    ) -> List[dict]:
+        """Triggers the job runs and waits for them to finish, keeping at most max_in_flight
+        runs unfinished at a time. Runs are triggered concurrently and all unfinished runs
+        are polled together.
+
+        Returns one result per command, in order, with the final run status and durations
+        or the error that prevented the run from being triggered.
+        """
+        max_in_flight = max_in_flight or len(commands)
+        queue = deque(enumerate(commands))
+        results = [None] * len(commands)
+        index_by_run_id = {}
+        pending = set()
+        finished = {}
+        last_statuses = {}
+        deadline = self.get_deadline()
+        interval = self.min_interval
+
+        with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+            while queue or pending:
+                batch = [
+                    queue.popleft()
+                    for _ in range(min(len(queue), max_in_flight - len(pending)))
+                ]
+                responses = executor.map(lambda item: trigger_run(item[1]), batch)
+                for (index, command), response in zip(batch, responses):
+                    if isinstance(response, requests.Response) and response.ok:
+                        run_id = int(response.json()["data"]["id"])
+                        index_by_run_id[run_id] = index
+                        pending.add(run_id)
+                    else:
+                        results[index] = {
+                            "job_id": command.job_id,
+                            "run_id": None,
+                            "error": describe_error(response),
+                        }
+
+                if not pending:
+                    continue
+                statuses = self.poll(pending, finished, last_statuses, on_status)
+                if queue and len(pending) < max_in_flight:
+                    # Trigger the next runs right away instead of waiting for a tick
+                    interval = self.min_interval
+                    continue
+                if pending:
+                    interval = self.next_interval(interval, statuses)
+                    self.sleep(interval, deadline, pending)
+
+        for run_id, index in index_by_run_id.items():
+            run = finished[run_id]
+            results[index] = {
+                "job_id": commands[index].job_id,
+                "run_id": run_id,
+                "status": DbtCloudRunStatus(run["status"]).name,
+                "duration": run.get("duration"),
+                "queued_duration": run.get("queued_duration"),
+                "run_duration": run.get("run_duration"),
+                "href": run.get("href"),
+            }
+        return results
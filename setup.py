@@ -30,13 +30,16 @@ setup(
         "ruamel.yaml",
         "sqlalchemy>=1.3.18",
         "rich>=12.0.0",
+        "ijson>=3.1",
     ],
     extras_require={
-        "test": ["pytest", "pytest-cov", "pytest-datadir", "requests-mock"],
+        "test": ["pytest", "pytest-cov", "pytest-datadir", "requests-mock", "httpx", "pyarrow", "flask"],
+        "async": ["httpx"],
+        "parquet": ["pyarrow"],
         "lint": ["black"],
         "demo": ["inquirer", "art"],
     },
     scripts=[],
-    entry_points={"console_scripts": ["dbt-cloud = dbt_cloud.cli:dbt_cloud"]},
+    entry_points={"console_scripts": ["dbt-cloud = dbt_cloud.daemon:main"]},
     package_data={"dbt_cloud": ["VERSION"]}
 )
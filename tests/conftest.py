@@ -1,6 +1,7 @@
 import json
 import pytest
 from pathlib import Path
+from dbt_cloud.cache import ArtifactCache
 from dbt_cloud.command import (
     DbtCloudJobCreateCommand,
     DbtCloudJobDeleteCommand,
@@ -187,6 +188,15 @@ COMMAND_TEST_CASES = [
 ]
 
 
+@pytest.fixture(autouse=True)
+def artifact_cache(tmp_path):
+    """Isolates the artifact cache of each test in a temporary directory."""
+    cache = ArtifactCache(directory=str(tmp_path / "artifact_cache"))
+    DbtCloudRunGetArtifactCommand.set_cache(cache)
+    yield cache
+    DbtCloudRunGetArtifactCommand.set_cache(None)
+
+
 @pytest.fixture
 def mock_dbt_cloud_api(requests_mock):
     """Loads static JSON responses to a request mocker. Dynamic response mocking based on request has not been implemented yet."""
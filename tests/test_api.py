@@ -0,0 +1,279 @@
+import gzip
+import importlib.util
+import json
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+import pytest
+from sqlalchemy import create_engine, text
+
+flask = pytest.importorskip("flask")
+
+pytestmark = pytest.mark.api
+
+API_DIR = Path(__file__).parent.parent / "api"
+
+
+@pytest.fixture(scope="module")
+def api():
+    # The API is run from its directory and imports its sibling modules as top-level modules
+    sys.path.insert(0, str(API_DIR))
+    try:
+        spec = importlib.util.spec_from_file_location("metrics_api", API_DIR / "api.py")
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(str(API_DIR))
+    return module
+
+
+class FakeResult:
+    def __init__(self, rows, rowcount=-1):
+        self.rows = rows
+        self.rowcount = rowcount
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, rows=(), rowcount=-1):
+        self.rows = list(rows)
+        self.rowcount = rowcount
+        self.executions = []
+
+    def execute(self, statement, params=None):
+        self.executions.append((str(statement), params))
+        return FakeResult(self.rows, self.rowcount)
+
+
+def test_cursor_round_trip(api):
+    cursor = api.encode_cursor(5, "model.a", 42)
+    assert api.decode_cursor(cursor) == (5, "model.a", 42)
+    assert api.decode_cursor(None) is None
+
+
+@pytest.mark.parametrize(
+    "cursor", ["not base64!", "bm90IGpzb24=", "WzUsICJtb2RlbC5hIl0="]
+)
+def test_decode_malformed_cursor(api, cursor):
+    # The last cursor is [5, "model.a"], issued before the row id was a sort key
+    with pytest.raises(ValueError):
+        api.decode_cursor(cursor)
+
+
+def test_keyset_filter_pages_through_duplicate_keys(api):
+    engine = create_engine("sqlite://")
+    rows = [
+        (1, "a", 1),
+        (1, "a", 4),
+        (1, "b", 2),
+        (1, "b", 5),
+        (2, "a", 3),
+        (2, "a", 6),
+    ]
+    keys = ("run_key", "unique_key", "id")
+    with engine.begin() as connection:
+        connection.execute(
+            text("create table metric (run_key integer, unique_key text, id integer)")
+        )
+        connection.execute(
+            text("insert into metric values (:run_key, :unique_key, :id)"),
+            [dict(zip(keys, row)) for row in rows],
+        )
+
+        fetched, after = [], None
+        while True:
+            # Every page ends between two rows with the same run and node
+            query = "select run_key, unique_key, id from metric"
+            params = {}
+            if after is not None:
+                query += f" where {api.keyset_filter(keys)}"
+                params = {f"after_{i}": value for i, value in enumerate(after)}
+            page = connection.execute(
+                text(f"{query} order by {', '.join(keys)} limit 1"), params
+            ).fetchall()
+            if not page:
+                break
+            fetched.extend(tuple(row) for row in page)
+            after = page[-1]
+    assert fetched == sorted(rows)
+
+
+def test_get_operational_metric_cursor(api, monkeypatch):
+    rows = [
+        ("svp", None, '{"unique_id": null}', None, None, -1, "", 7),
+        ("svp", 5, '{"unique_id": "model.a"}', None, None, 5, "model.a", 3),
+        ("svp", 5, '{"unique_id": "model.a"}', None, None, 5, "model.a", 9),
+    ]
+    connection = FakeConnection(rows)
+    monkeypatch.setattr(api, "get_connection", lambda: connection)
+    client = api.app.test_client()
+
+    body = client.get("/metric/operational?limit=2").get_json()
+    assert [metric["run_id"] for metric in body["data"]] == [None, 5]
+    assert body["data"][0]["metric"] == {"unique_id": None}
+    assert api.decode_cursor(body["next_cursor"]) == (5, "model.a", 3)
+
+    connection.rows = rows[2:]
+    body = client.get(
+        f"/metric/operational?limit=2&cursor={body['next_cursor']}"
+    ).get_json()
+    assert len(body["data"]) == 1
+    assert body["next_cursor"] is None
+    statement, params = connection.executions[-1]
+    assert api.keyset_filter(api.OPERATIONAL_METRIC_SORT_KEYS) in statement
+    assert params == {"limit": 3, "after_0": 5, "after_1": "model.a", "after_2": 3}
+
+
+def test_get_operational_metric_invalid_cursor(api):
+    response = api.app.test_client().get("/metric/operational?cursor=not-a-cursor")
+    assert response.status_code == 400
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(api, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(sys.modules[api.ResponseCache.__module__], "time", clock)
+    return clock
+
+
+def test_response_cache_expires_entries(api, clock):
+    cache = api.ResponseCache(ttl=10)
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    clock.now += 10
+    assert cache.get("key") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 0, "ttl": 10}
+
+
+def test_response_cache_evicts_oldest_entry(api, clock):
+    cache = api.ResponseCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 3)
+    cache.set("c", 4)
+    assert cache.get("b") is None
+    assert cache.get("a") == 3
+    assert cache.get("c") == 4
+
+
+def test_response_cache_clear_discards_stale_values(api, clock):
+    cache = api.ResponseCache()
+    cache.set("a", 1)
+    generation = cache.generation
+    cache.clear()
+    assert cache.get("a") is None
+    # A value computed before the clear is not stored
+    cache.set("a", 2, generation)
+    assert cache.get("a") is None
+    cache.set("a", 3, cache.generation)
+    assert cache.get("a") == 3
+
+
+def test_cached_view(api, clock):
+    app = flask.Flask(__name__)
+    cache = api.ResponseCache()
+    calls = []
+
+    @app.route("/value")
+    @cache.cached
+    def value():
+        calls.append(flask.request.args.get("q"))
+        return flask.jsonify({"q": flask.request.args.get("q")})
+
+    @app.route("/error")
+    @cache.cached
+    def error():
+        calls.append("error")
+        return flask.jsonify({}), 500
+
+    client = app.test_client()
+    first = client.get("/value?q=1")
+    second = client.get("/value?q=1")
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert second.get_json() == {"q": "1"}
+    assert client.get("/value?q=2").headers["X-Cache"] == "MISS"
+    client.get("/error")
+    client.get("/error")
+    assert calls == ["1", "2", "error", "error"]
+    assert cache.stats()["hits"] == 1
+
+
+def test_insert_operational_metrics_in_batches(api):
+    rows = [{"run_id": i} for i in range(5)]
+    connection = FakeConnection(rowcount=-1)
+    assert api.insert_operational_metrics(connection, rows, batch_size=2) == 5
+    assert [params for _, params in connection.executions] == [
+        rows[0:2],
+        rows[2:4],
+        rows[4:],
+    ]
+    assert (
+        "from values (:project, :run_id, :data, :generated_at, :inserted_at)"
+        in connection.executions[0][0]
+    )
+
+    # The reported row count is used when the driver provides it
+    assert (
+        api.insert_operational_metrics(FakeConnection(rowcount=1), rows, batch_size=2)
+        == 3
+    )
+
+
+class FakeEngine:
+    def __init__(self):
+        self.connection = FakeConnection(rowcount=-1)
+
+    @contextmanager
+    def begin(self):
+        yield self.connection
+
+
+def test_bulk_insert_operational_metrics(api, monkeypatch):
+    engine = FakeEngine()
+    monkeypatch.setattr(api, "engine", engine)
+    monkeypatch.setattr(api, "insert_batch_size", 2)
+    api.response_cache.set("key", "value")
+    payloads = [
+        {
+            "project": "svp",
+            "run_id": run_id,
+            "generated_at": "2023-07-20T02:40:27Z",
+            "metrics": [{"unique_id": "model.a"}] * 2,
+        }
+        for run_id in (1, 2)
+    ]
+
+    response = api.app.test_client().post(
+        "/metric/operational/bulk",
+        data=gzip.compress(json.dumps(payloads).encode()),
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+    )
+    assert response.status_code == 200
+    assert response.get_json()["inserted"] == 4
+    assert response.get_json()["runs"] == 2
+    batches = [params for _, params in engine.connection.executions]
+    assert [[row["run_id"] for row in batch] for batch in batches] == [[1, 1], [2, 2]]
+    assert json.loads(batches[0][0]["data"]) == {"unique_id": "model.a"}
+    # Posting metrics invalidates the cached read responses
+    assert api.response_cache.get("key") is None
+
+
+@pytest.mark.parametrize("data", [b"not gzip", gzip.compress(b'{"not": "a list"}')])
+def test_bulk_insert_invalid_payload(api, data):
+    response = api.app.test_client().post(
+        "/metric/operational/bulk", data=data, headers={"Content-Encoding": "gzip"}
+    )
+    assert response.status_code == 400
@@ -0,0 +1,100 @@
+import os
+import pytest
+from click.testing import CliRunner
+from dbt_cloud.cache import ArtifactCache
+from dbt_cloud.cli import dbt_cloud
+from dbt_cloud.command import DbtCloudRunGetArtifactCommand, DbtCloudRunGetCommand
+
+pytestmark = pytest.mark.run
+
+
+def get_artifact_command(**kwargs):
+    return DbtCloudRunGetArtifactCommand(
+        api_token="foo", account_id=123, run_id=456, path="run_results.json", **kwargs
+    )
+
+
+def test_get_artifact_is_cached(requests_mock):
+    command = get_artifact_command(is_complete=True)
+    requests_mock.get(command.api_url, json={"results": []})
+
+    assert command.execute().json() == {"results": []}
+    assert command.execute().json() == {"results": []}
+    assert requests_mock.call_count == 1
+
+
+def test_download_is_cached(requests_mock, tmp_path):
+    command = get_artifact_command(is_complete=True)
+    requests_mock.get(command.api_url, content=b'{"results": []}')
+
+    for filename in ("first.json", "second.json"):
+        with open(tmp_path / filename, "wb") as f:
+            assert command.download(f).status_code == 200
+        assert (tmp_path / filename).read_bytes() == b'{"results": []}'
+    assert requests_mock.call_count == 1
+
+
+def test_get_artifact_no_cache(requests_mock):
+    command = get_artifact_command(no_cache=True, is_complete=True)
+    requests_mock.get(command.api_url, json={"results": []})
+
+    command.execute()
+    command.execute()
+    assert requests_mock.call_count == 2
+
+
+@pytest.mark.parametrize("step", [None, 2])
+def test_get_artifact_of_incomplete_run(requests_mock, tmp_path, step):
+    command = get_artifact_command(step=step)
+    requests_mock.get(command.api_url, content=b'{"results": []}')
+
+    command.execute()
+    with open(tmp_path / "run_results.json", "wb") as f:
+        command.download(f)
+    command.execute()
+    # Only the artifacts of a specific step are final while the run is in progress
+    assert requests_mock.call_count == (3 if step is None else 1)
+
+
+def test_get_artifact_error_is_not_cached(requests_mock):
+    command = get_artifact_command(is_complete=True)
+    requests_mock.get(command.api_url, status_code=404, json={})
+
+    command.execute()
+    command.execute()
+    assert requests_mock.call_count == 2
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = ArtifactCache(directory=str(tmp_path), max_size=10)
+    cache.put((1, 1, None, "a.json"), b"aaaa")
+    cache.put((1, 2, None, "a.json"), b"bbbb")
+    os.utime(cache._entry_path((1, 1, None, "a.json")), (0, 0))
+    os.utime(cache._entry_path((1, 2, None, "a.json")), (1, 1))
+    assert cache.get((1, 1, None, "a.json")) == b"aaaa"
+
+    cache.put((1, 3, None, "a.json"), b"cccc")
+    assert cache.get((1, 2, None, "a.json")) is None
+    assert cache.get((1, 1, None, "a.json")) == b"aaaa"
+    assert cache.get((1, 3, None, "a.json")) == b"cccc"
+
+
+@pytest.mark.parametrize("is_complete", [True, False])
+def test_get_artifact_cli_caches_complete_runs(requests_mock, tmp_path, is_complete):
+    command = get_artifact_command()
+    run_url = DbtCloudRunGetCommand(api_token="foo", account_id=123, run_id=456).api_url
+    run = requests_mock.get(
+        run_url, json={"data": {"id": 456, "is_complete": is_complete}}
+    )
+    artifact = requests_mock.get(command.api_url, content=b'{"results": []}')
+    args = ["run", "get-artifact", "--api-token", "foo", "--account-id", "123"]
+    args += ["--run-id", "456", "--path", "run_results.json"]
+
+    for filename in ("first.json", "second.json"):
+        output_file = tmp_path / filename
+        result = CliRunner().invoke(dbt_cloud, args + ["-f", str(output_file)])
+        assert result.exit_code == 0, result.output
+        assert output_file.read_bytes() == b'{"results": []}'
+    # The second invocation of a complete run is served from the cache alone
+    assert artifact.call_count == (1 if is_complete else 2)
+    assert run.call_count == (1 if is_complete else 2)
@@ -0,0 +1,292 @@
+import gzip
+import json
+import os
+import pytest
+import requests
+from contextlib import contextmanager
+from dbt_cloud.collect import PING, Collector, iter_upload_batches
+from dbt_cloud.datasource import SnowflakeConnector
+from dbt_cloud.store import MetricStore
+from dbt_cloud.command import DbtCloudRunGetArtifactCommand, DbtCloudRunListCommand
+from dbt_cloud.configuration import Configuration, Job
+from .conftest import load_response
+
+pytestmark = pytest.mark.run
+
+ACCOUNT_ID = 123456
+PROJECT_ID = 123457
+JOB_ID = 43167
+RUN_IDS = [3, 2, 1]
+
+
+@pytest.fixture
+def configurator():
+    job = Job(
+        name="pytest job",
+        execute_steps=["dbt run"],
+        tracking=True,
+        schedule="daily",
+        environment_id=49819,
+        job_id=JOB_ID,
+        project_id=PROJECT_ID,
+        dbt_version=None,
+        generate_docs=False,
+        run_generate_sources=False,
+    )
+    return Configuration(
+        account_id=ACCOUNT_ID,
+        project_name="pytest",
+        environments=[],
+        jobs=[job],
+        project_id=PROJECT_ID,
+    )
+
+
+@pytest.fixture
+def mock_collect_api(requests_mock, monkeypatch):
+    monkeypatch.setenv("DBT_CLOUD_API_TOKEN", "foo")
+    monkeypatch.setenv("DBT_CLOUD_ACCOUNT_ID", str(ACCOUNT_ID))
+    requests_mock.get(
+        DbtCloudRunListCommand(account_id=ACCOUNT_ID).api_url,
+        json={"data": [{"id": run_id} for run_id in RUN_IDS]},
+    )
+    artifact = load_response("run_get_artifact_response")
+    for run_id in RUN_IDS:
+        url = DbtCloudRunGetArtifactCommand(
+            account_id=ACCOUNT_ID, run_id=run_id, path="run_results.json"
+        ).api_url
+        if run_id == 2:
+            requests_mock.get(url, status_code=404, json={})
+        else:
+            requests_mock.get(url, json=artifact)
+    return artifact
+
+
+@pytest.mark.parametrize("concurrency", [1, 4])
+def test_collect_preserves_run_order(
+    configurator, mock_collect_api, tmp_path, monkeypatch, concurrency
+):
+    monkeypatch.chdir(tmp_path)
+    collector = Collector(
+        configurator=configurator, limit=len(RUN_IDS), concurrency=concurrency
+    )
+    collector.collect(archive=False)
+
+    payloads = json.loads((tmp_path / ".artifacts" / "metric.json").read_text())
+    assert [payload["run_id"] for payload in payloads] == [3, 1]
+    assert len(payloads[0]["metrics"]) == len(mock_collect_api["results"])
+    assert payloads[0]["metrics"][0]["job_id"] == JOB_ID
+
+    run_results_dir = tmp_path / ".artifacts" / "run_results" / f"job_id={JOB_ID}"
+    assert sorted(os.listdir(run_results_dir)) == [
+        f"{JOB_ID}-1-run_results.json.gz",
+        f"{JOB_ID}-3-run_results.json.gz",
+    ]
+    with gzip.open(run_results_dir / f"{JOB_ID}-3-run_results.json.gz") as f:
+        assert json.load(f) == mock_collect_api
+
+    with MetricStore(str(tmp_path / ".artifacts" / "metrics.db")) as store:
+        unique_id = mock_collect_api["results"][0]["unique_id"]
+        assert [m["run_id"] for m in store.get_node_history(unique_id)] == [1, 3]
+
+
+def test_collect_parquet_format(configurator, mock_collect_api, tmp_path, monkeypatch):
+    pq = pytest.importorskip("pyarrow.parquet")
+    monkeypatch.chdir(tmp_path)
+    collector = Collector(configurator=configurator, limit=len(RUN_IDS))
+    collector.collect(archive=False, output_format="parquet")
+
+    table = pq.read_table(tmp_path / ".artifacts" / "metric.parquet")
+    assert table.num_rows == 2 * len(mock_collect_api["results"])
+    assert table.column("run_id").to_pylist()[0] == 3
+    assert str(table.schema.field("collected_at").type) == "timestamp[us, tz=UTC]"
+    metadata = pq.ParquetFile(tmp_path / ".artifacts" / "metric.parquet").metadata
+    unique_id = metadata.row_group(0).column(0)
+    assert unique_id.compression == "ZSTD"
+    assert "RLE_DICTIONARY" in unique_id.encodings
+
+
+def test_collect_incremental_skips_collected_runs(
+    configurator, mock_collect_api, requests_mock, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    collector = Collector(configurator=configurator, limit=len(RUN_IDS))
+    collector.collect(archive=False, incremental=True)
+    state = json.loads((tmp_path / ".artifacts" / "state.json").read_text())
+    assert state["watermarks"] == {str(JOB_ID): 3}
+
+    requests_mock.get(
+        DbtCloudRunListCommand(account_id=ACCOUNT_ID).api_url,
+        json={"data": [{"id": 5, "is_complete": False}, {"id": 4}, {"id": 3}]},
+    )
+    for run_id in (4, 5):
+        url = DbtCloudRunGetArtifactCommand(
+            account_id=ACCOUNT_ID, run_id=run_id, path="run_results.json"
+        ).api_url
+        requests_mock.get(url, json=mock_collect_api)
+    collector.collect(archive=False, incremental=True)
+
+    payloads = json.loads((tmp_path / ".artifacts" / "metric.json").read_text())
+    assert [payload["run_id"] for payload in payloads] == [5, 4]
+    state = json.loads((tmp_path / ".artifacts" / "state.json").read_text())
+    assert state["watermarks"] == {str(JOB_ID): 4}
+
+
+def test_collect_incremental_lists_runs_up_to_watermark(
+    configurator, mock_collect_api, requests_mock, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    collector = Collector(configurator=configurator, limit=1)
+    collector.collect(archive=False, incremental=True)
+    state = json.loads((tmp_path / ".artifacts" / "state.json").read_text())
+    assert state["watermarks"] == {str(JOB_ID): 3}
+
+    # More runs than the limit were created since, over two pages
+    run_list = requests_mock.get(
+        DbtCloudRunListCommand(account_id=ACCOUNT_ID).api_url,
+        [
+            {
+                "json": {"data": [{"id": 6}, {"id": 5}]},
+                "headers": {"x-dbt-continuation-token": "next"},
+            },
+            {"json": {"data": [{"id": 4}, {"id": 3}, {"id": 2}]}},
+        ],
+    )
+    for run_id in (4, 5, 6):
+        url = DbtCloudRunGetArtifactCommand(
+            account_id=ACCOUNT_ID, run_id=run_id, path="run_results.json"
+        ).api_url
+        requests_mock.get(url, json=mock_collect_api)
+    collector.collect(archive=False, incremental=True)
+
+    assert run_list.call_count == 2
+    assert run_list.last_request.qs["order_by"] == ["-id"]
+    payloads = json.loads((tmp_path / ".artifacts" / "metric.json").read_text())
+    assert [payload["run_id"] for payload in payloads] == [6, 5, 4]
+    state = json.loads((tmp_path / ".artifacts" / "state.json").read_text())
+    assert state["watermarks"] == {str(JOB_ID): 6}
+
+
+def test_collect_incremental_refetches_incomplete_run(
+    configurator, requests_mock, tmp_path, monkeypatch
+):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DBT_CLOUD_API_TOKEN", "foo")
+    monkeypatch.setenv("DBT_CLOUD_ACCOUNT_ID", str(ACCOUNT_ID))
+    artifact = load_response("run_get_artifact_response")
+    run_list_url = DbtCloudRunListCommand(account_id=ACCOUNT_ID).api_url
+    artifact_url = DbtCloudRunGetArtifactCommand(
+        account_id=ACCOUNT_ID, run_id=5, path="run_results.json"
+    ).api_url
+    collector = Collector(configurator=configurator, limit=1)
+
+    requests_mock.get(run_list_url, json={"data": [{"id": 5, "is_complete": False}]})
+    requests_mock.get(
+        artifact_url, json={**artifact, "results": artifact["results"][:1]}
+    )
+    collector.collect(archive=False, incremental=True)
+
+    requests_mock.get(run_list_url, json={"data": [{"id": 5, "is_complete": True}]})
+    requests_mock.get(artifact_url, json=artifact)
+    collector.collect(archive=False, incremental=True)
+
+    payloads = json.loads((tmp_path / ".artifacts" / "metric.json").read_text())
+    assert len(payloads[0]["metrics"]) == len(artifact["results"])
+
+
+class FakeEngine:
+    def __init__(self):
+        self.statements = []
+        self.uploaded = []
+
+    @contextmanager
+    def begin(self):
+        yield self
+
+    def execute(self, statement):
+        statement = str(statement).strip()
+        if statement.startswith("put"):
+            upload_dir = os.path.dirname(statement.split("'")[1][len("file://") :])
+            self.uploaded.extend(os.listdir(upload_dir))
+        self.statements.append(statement)
+
+
+def test_archive_loads_all_files_with_one_put_and_copy(
+    configurator, tmp_path, monkeypatch
+):
+    engine = FakeEngine()
+    monkeypatch.setattr(SnowflakeConnector, "create_engine", lambda self: engine)
+    filepaths = []
+    for run_id in RUN_IDS:
+        run_dir = tmp_path / str(run_id)
+        run_dir.mkdir()
+        filepath = run_dir / "run_results.json"
+        filepath.write_text("{}")
+        filepaths.append(str(filepath))
+
+    collector = Collector(
+        configurator=configurator,
+        datasource={"database": "db", "schema": "metrics", "stage": "artifacts"},
+    )
+    collector.archive(filepaths)
+
+    put, copy, remove = engine.statements
+    prefix = put.split("@")[1].split(" ")[0]
+    assert prefix.startswith("artifacts/collect/")
+    assert f"from  @{prefix}" in copy
+    assert remove == f"remove @{prefix};"
+    assert len(engine.uploaded) == len(RUN_IDS)
+
+
+def test_iter_upload_batches_bounds_batch_size():
+    payloads = [
+        {"run_id": run_id, "metrics": [{"unique_id": "x" * 40}]} for run_id in range(5)
+    ]
+    item_size = len(json.dumps(payloads[0], separators=(",", ":")))
+    batches = list(iter_upload_batches(payloads, max_bytes=2 * item_size + 3))
+
+    assert [count for count, _ in batches] == [2, 2, 1]
+    assert [p for _, body in batches for p in json.loads(body)] == payloads
+    # A payload larger than the limit is still sent, on its own
+    assert [count for count, _ in iter_upload_batches(payloads, max_bytes=1)] == [1] * 5
+
+
+def test_upload_sends_gzipped_batches(configurator, requests_mock, monkeypatch):
+    monkeypatch.setenv("DBT_CLOUD_UPLOAD_BATCH_SIZE_MB", "0.0002")
+    collector = Collector(configurator=configurator)
+    requests_mock.get(PING, json={"message": "pong"})
+    bulk = requests_mock.post(collector.bulk_api_url, json={"inserted": 1})
+    payloads = [
+        {"run_id": run_id, "metrics": [{"unique_id": "x" * 40}]} for run_id in range(5)
+    ]
+
+    assert collector.upload(payloads)
+
+    assert bulk.call_count > 1
+    uploaded = []
+    for request in bulk.request_history:
+        assert request.headers["Content-Encoding"] == "gzip"
+        uploaded.extend(json.loads(gzip.decompress(request.body)))
+    assert uploaded == payloads
+
+
+@pytest.mark.parametrize(
+    "bulk_response",
+    [{"status_code": 500}, {"exc": requests.exceptions.ConnectionError}],
+)
+def test_collect_incremental_upload_failure_keeps_watermark(
+    configurator, mock_collect_api, requests_mock, tmp_path, monkeypatch, bulk_response
+):
+    monkeypatch.chdir(tmp_path)
+    requests_mock.get(PING, json={"message": "pong"})
+    bulk = requests_mock.post(Collector(configurator).bulk_api_url, **bulk_response)
+    collector = Collector(configurator=configurator, limit=len(RUN_IDS))
+    collector.collect(archive=False, incremental=True, upload=True)
+
+    assert bulk.call_count == 1
+    assert not (tmp_path / ".artifacts" / "state.json").exists()
+
+    requests_mock.post(collector.bulk_api_url, json={"inserted": 1})
+    collector.collect(archive=False, incremental=True, upload=True)
+    state = json.loads((tmp_path / ".artifacts" / "state.json").read_text())
+    assert state["watermarks"] == {str(JOB_ID): 3}
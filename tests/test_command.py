@@ -1,5 +1,17 @@
+import asyncio
 import pytest
-from dbt_cloud.command.command import translate_click_options
+import requests
+import click
+from dbt_cloud.command import (
+    DbtCloudJobCreateCommand,
+    DbtCloudJobGetCommand,
+    DbtCloudRunGetCommand,
+)
+from dbt_cloud.command.command import (
+    DbtCloudCommand,
+    get_click_option_specs,
+    translate_click_options,
+)
 from .conftest import COMMAND_TEST_CASES
 
 
@@ -14,6 +26,27 @@ class TestCommand:
         actual_response.raise_for_status()
         assert actual_response.json() == response
 
+    def test_execute_async(self, test_case_name, command, response, http_method):
+        httpx = pytest.importorskip("httpx")
+
+        def handler(request):
+            assert request.method == http_method.upper()
+            assert str(request.url.copy_with(query=None)) == command.api_url
+            return httpx.Response(200, json=response)
+
+        async def execute():
+            async with httpx.AsyncClient(
+                transport=httpx.MockTransport(handler)
+            ) as client:
+                DbtCloudCommand.set_async_client(client)
+                return await command.execute_async()
+
+        try:
+            actual_response = asyncio.run(execute())
+        finally:
+            DbtCloudCommand.set_async_client(None)
+        assert actual_response.json() == response
+
 
 def test_translate_nested_click_options():
     kwargs = {
@@ -28,3 +61,54 @@ def test_translate_nested_click_options():
         "settings": {"threads": 4},
         "foo": {"baz": "orange", "bar": {"baz": "apple"}},
     }
+
+
+def test_click_option_specs_are_cached():
+    specs = get_click_option_specs(DbtCloudJobCreateCommand)
+    assert get_click_option_specs(DbtCloudJobCreateCommand) is specs
+    param_decls = [decls for decls, _ in specs]
+    assert ("--settings-threads", "settings__threads") in param_decls
+    assert ("--schedule-cron", "schedule__cron") in param_decls
+
+
+def test_click_options_can_be_applied_repeatedly():
+    for _ in range(2):
+        command = click.command()(
+            DbtCloudJobCreateCommand.click_options(lambda **kwargs: None)
+        )
+        names = [param.name for param in command.params]
+        assert names[:3] == ["api_token", "dbt_cloud_host", "account_id"]
+        assert "settings__threads" in names
+
+
+def test_commands_share_session():
+    job_get = DbtCloudJobGetCommand(api_token="foo", account_id=123, job_id=123)
+    run_get = DbtCloudRunGetCommand(api_token="foo", account_id=123, run_id=123)
+    assert job_get.session is run_get.session
+
+
+def test_set_session_is_used_by_execute(requests_mock):
+    session = requests.Session()
+    DbtCloudCommand.set_session(session)
+    try:
+        command = DbtCloudJobGetCommand(api_token="foo", account_id=123, job_id=123)
+        assert command.session is session
+        requests_mock.get(command.api_url, json={"data": {"id": 123}})
+        assert command.execute().json() == {"data": {"id": 123}}
+    finally:
+        DbtCloudCommand.set_session(None)
+
+
+def test_async_client_is_shared_per_event_loop():
+    pytest.importorskip("httpx")
+
+    async def get_clients():
+        clients = (
+            DbtCloudCommand.get_async_client(),
+            DbtCloudCommand.get_async_client(),
+        )
+        await DbtCloudCommand.close_async_client()
+        return clients
+
+    first, second = asyncio.run(get_clients())
+    assert first is second
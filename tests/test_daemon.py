@@ -0,0 +1,168 @@
+import importlib
+import multiprocessing
+import os
+import select
+import signal
+import socket
+import sys
+import threading
+import time
+import pytest
+from dbt_cloud import __version__
+from dbt_cloud import daemon as daemon_module
+from click.testing import CliRunner
+from dbt_cloud.cli import dbt_cloud
+from dbt_cloud.daemon import DaemonServer, _send_fds, _send_message, forward
+
+pytestmark = pytest.mark.cli
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    # The daemon runs in its own process, like it does in practice, so that the children
+    # it forks do not inherit the client ends of the test's connections
+    server = DaemonServer(str(tmp_path / "daemon.sock"))
+    process = multiprocessing.get_context("fork").Process(target=server.serve_forever)
+    process.start()
+    server.socket.close()
+    yield server
+    process.terminate()
+    process.join()
+
+
+@pytest.fixture
+def blocking_daemon(tmp_path, monkeypatch):
+    """Daemon whose commands write their pid to a file and then block until interrupted."""
+    ready_path = tmp_path / "ready"
+
+    def run_cli(args):
+        ready_path.write_text(str(os.getpid()))
+        try:
+            time.sleep(30)
+        except KeyboardInterrupt:
+            return 130
+        return 0
+
+    # Patched before the daemon process is forked, so that it is inherited
+    monkeypatch.setattr(daemon_module, "run_cli", run_cli)
+    server = DaemonServer(str(tmp_path / "daemon.sock"))
+    process = multiprocessing.get_context("fork").Process(target=server.serve_forever)
+    process.start()
+    server.socket.close()
+    yield server, ready_path
+    process.terminate()
+    process.join()
+
+
+def wait_for_file(path, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not path.exists() or not path.read_text():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return path.read_text()
+
+
+def test_forward_runs_command_on_daemon(daemon, capfd):
+    assert forward(["version"], daemon.socket_path) == 0
+    assert capfd.readouterr().out.strip() == __version__
+
+
+def test_forward_returns_exit_code(daemon, capfd):
+    assert forward(["no-such-command"], daemon.socket_path) == 2
+    assert "No such command" in capfd.readouterr().err
+
+
+def test_forward_uses_client_working_directory_and_environment(
+    daemon, tmp_path, monkeypatch, capfd
+):
+    (tmp_path / "job.json").write_text(
+        '{"name": "foo", "execute_steps": ["dbt run"], "project_id": 1, "environment_id": 1}'
+    )
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("DBT_CLOUD_API_TOKEN", "foo")
+    monkeypatch.setenv("DBT_CLOUD_HOST", "127.0.0.1:9")
+    assert forward(["job", "import", "-f", "job.json"], daemon.socket_path) == 1
+    assert "host='127.0.0.1', port=9" in capfd.readouterr().err
+
+
+def test_forward_without_daemon(tmp_path):
+    assert forward(["version"], str(tmp_path / "daemon.sock")) is None
+
+
+def test_daemon_removes_socket_on_close(tmp_path):
+    socket_path = str(tmp_path / "daemon.sock")
+    server = DaemonServer(socket_path)
+    assert os.path.exists(socket_path)
+    server.server_close()
+    assert not os.path.exists(socket_path)
+
+
+def test_daemon_refuses_to_start_twice(daemon):
+    with pytest.raises(OSError):
+        DaemonServer(daemon.socket_path)
+
+
+def test_forward_relays_signals(blocking_daemon):
+    server, ready_path = blocking_daemon
+
+    def interrupt():
+        wait_for_file(ready_path)
+        os.kill(os.getpid(), signal.SIGINT)
+
+    thread = threading.Thread(target=interrupt)
+    thread.start()
+    started = time.monotonic()
+    assert forward(["version"], server.socket_path) == 130
+    assert time.monotonic() - started < 10
+    thread.join()
+
+
+def test_daemon_kills_command_when_client_disconnects(blocking_daemon):
+    server, ready_path = blocking_daemon
+    read_fd, write_fd = os.pipe()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(server.socket_path)
+        _send_fds(sock, (0, write_fd, 2))
+        os.close(write_fd)
+        _send_message(sock, {"args": ["version"], "cwd": os.getcwd(), "env": {}})
+        wait_for_file(ready_path)
+        sock.close()
+
+        # The pipe is closed once the command, which holds its write end, is gone
+        readable, _, _ = select.select([read_fd], [], [], 10)
+        assert readable
+        assert os.read(read_fd, 1) == b""
+    finally:
+        sock.close()
+        os.close(read_fd)
+
+
+@pytest.fixture
+def unsupported_platform(monkeypatch):
+    """Reloads the daemon module as if it ran on a platform without fork and Unix sockets."""
+    monkeypatch.delattr(os, "fork")
+    monkeypatch.delattr(socket, "AF_UNIX")
+    monkeypatch.delattr(signal, "SIGHUP")
+    yield importlib.reload(daemon_module)
+    monkeypatch.undo()
+    importlib.reload(daemon_module)
+
+
+def test_daemon_is_optional_on_unsupported_platform(
+    unsupported_platform, monkeypatch, capfd
+):
+    assert not unsupported_platform.DAEMON_SUPPORTED
+    assert unsupported_platform.forward(["version"]) is None
+
+    monkeypatch.setattr(sys, "argv", ["dbt-cloud", "version"])
+    with pytest.raises(SystemExit) as e:
+        unsupported_platform.main()
+    assert e.value.code == 0
+    assert capfd.readouterr().out.strip() == __version__
+
+
+def test_serve_on_unsupported_platform(unsupported_platform):
+    result = CliRunner().invoke(dbt_cloud, ["serve"])
+    assert result.exit_code != 0
+    assert "not support" in str(result.exception)
@@ -1,5 +1,16 @@
+import json
 import pytest
-from dbt_cloud.command import DbtCloudJobCreateCommand, DbtCloudJobRunCommand
+from click.testing import CliRunner
+from dbt_cloud.cli import dbt_cloud
+from dbt_cloud.command import (
+    DbtCloudJobCreateCommand,
+    DbtCloudJobDeleteCommand,
+    DbtCloudJobListCommand,
+    DbtCloudJobRunCommand,
+    DbtCloudRunListCommand,
+)
+from dbt_cloud.exc import DbtCloudException
+from dbt_cloud.waiter import RunWaiter
 
 pytestmark = pytest.mark.job
 
@@ -30,3 +41,86 @@ def test_job_create_command_import_from_json(job_get):
     assert command.schedule.cron == "0 * * * *"
     assert command.schedule.date.type.value == "every_day"
     assert command.schedule.time.type.value == "every_hour"
+
+
+def test_job_list_iter_items_without_pagination_info(requests_mock):
+    command = DbtCloudJobListCommand(api_token="foo", account_id=123)
+    requests_mock.get(
+        command.api_url,
+        [
+            {"json": {"data": [{"id": job_id} for job_id in range(100)]}},
+            {"json": {"data": [{"id": 100}]}},
+        ],
+    )
+    assert [job["id"] for job in command.iter_items()] == list(range(101))
+    assert requests_mock.call_count == 2
+
+
+def test_run_waiter_run_jobs(requests_mock, monkeypatch):
+    monkeypatch.setattr("dbt_cloud.waiter.time.sleep", lambda seconds: None)
+    commands = [
+        DbtCloudJobRunCommand(api_token="foo", account_id=123, job_id=job_id)
+        for job_id in (1, 2, 3)
+    ]
+    requests_mock.post(commands[0].api_url, json={"data": {"id": 11}})
+    requests_mock.post(commands[1].api_url, status_code=400, json={})
+    requests_mock.post(commands[2].api_url, json={"data": {"id": 13}})
+    requests_mock.get(
+        DbtCloudRunListCommand(api_token="foo", account_id=123).api_url,
+        [
+            {"json": {"data": [{"id": 11, "status": 3}]}},
+            {"json": {"data": [{"id": 11, "status": 10, "duration": "00:01:00"}]}},
+            {"json": {"data": [{"id": 13, "status": 20, "duration": "00:00:30"}]}},
+        ],
+    )
+
+    waiter = RunWaiter(api_token="foo", account_id=123)
+    results = waiter.run_jobs(commands, max_in_flight=1)
+
+    assert [result["run_id"] for result in results] == [11, None, 13]
+    assert results[0]["status"] == "SUCCESS"
+    assert results[0]["duration"] == "00:01:00"
+    assert results[1]["error"].startswith("400")
+    assert results[2]["status"] == "ERROR"
+    # Job 3 is only triggered after the run of job 1 has finished
+    methods = [request.method for request in requests_mock.request_history]
+    assert methods == ["POST", "GET", "GET", "POST", "POST", "GET"]
+
+
+def test_job_delete_all_reports_failures(requests_mock, tmp_path):
+    requests_mock.get(
+        DbtCloudJobListCommand(api_token="foo", account_id=123).api_url,
+        json={"data": [{"id": job_id} for job_id in (1, 2, 3)]},
+    )
+    for job_id in (1, 2, 3):
+        requests_mock.delete(
+            DbtCloudJobDeleteCommand(
+                api_token="foo", account_id=123, job_id=job_id
+            ).api_url,
+            status_code=404 if job_id == 2 else 200,
+            json={"data": {"id": job_id}},
+        )
+    output_file = tmp_path / "deleted.json"
+
+    result = CliRunner().invoke(
+        dbt_cloud,
+        [
+            "job",
+            "delete-all",
+            "--api-token",
+            "foo",
+            "--account-id",
+            "123",
+            "--yes",
+            "-f",
+            str(output_file),
+        ],
+    )
+
+    assert isinstance(result.exception, DbtCloudException)
+    assert "Failed to delete jobs [2]" in str(result.exception)
+    assert "Deleted 2 jobs, 1 failed." in result.output
+    assert json.loads(output_file.read_text()) == [
+        {"data": {"id": 1}},
+        {"data": {"id": 3}},
+    ]
@@ -0,0 +1,92 @@
+import pytest
+import requests
+from dbt_cloud.command import (
+    DbtCloudJobGetCommand,
+    DbtCloudJobRunCommand,
+    DbtCloudRunCancelCommand,
+)
+from dbt_cloud.command.command import DbtCloudCommand
+from dbt_cloud.retry import RetryPolicy, TokenBucket, parse_retry_after
+
+
+@pytest.fixture(autouse=True)
+def retry_policy(monkeypatch):
+    delays = []
+    monkeypatch.setattr("dbt_cloud.command.command.time.sleep", delays.append)
+    DbtCloudCommand.set_retry_policy(RetryPolicy(max_retries=2, backoff_factor=0.1))
+    yield delays
+    DbtCloudCommand.set_retry_policy(None)
+
+
+def test_execute_retries_throttled_and_failed_requests(requests_mock, retry_policy):
+    command = DbtCloudJobGetCommand(api_token="foo", account_id=123, job_id=123)
+    requests_mock.get(
+        command.api_url,
+        [
+            {"status_code": 429, "headers": {"Retry-After": "7"}},
+            {"status_code": 503},
+            {"status_code": 200, "json": {"data": {"id": 123}}},
+        ],
+    )
+    response = command.execute()
+    assert response.json() == {"data": {"id": 123}}
+    assert requests_mock.call_count == 3
+    assert retry_policy[0] == 7
+    assert 0 <= retry_policy[1] <= 0.2
+
+
+def test_execute_gives_up_after_max_retries(requests_mock):
+    command = DbtCloudJobGetCommand(api_token="foo", account_id=123, job_id=123)
+    requests_mock.get(command.api_url, status_code=503)
+    assert command.execute().status_code == 503
+    assert requests_mock.call_count == 3
+
+
+def test_execute_does_not_retry_non_idempotent_server_errors(requests_mock):
+    command = DbtCloudJobRunCommand(api_token="foo", account_id=123, job_id=123)
+    requests_mock.post(command.api_url, status_code=503)
+    assert command.execute().status_code == 503
+    assert requests_mock.call_count == 1
+
+
+def test_execute_retries_idempotent_post_requests(requests_mock):
+    command = DbtCloudRunCancelCommand(api_token="foo", account_id=123, run_id=456)
+    requests_mock.post(
+        command.api_url,
+        [
+            {"status_code": 503},
+            {"exc": requests.ConnectionError},
+            {"json": {"data": {"id": 456}}},
+        ],
+    )
+    assert command.execute().json() == {"data": {"id": 456}}
+    assert requests_mock.call_count == 3
+
+
+def test_execute_retries_connection_errors(requests_mock):
+    command = DbtCloudJobGetCommand(api_token="foo", account_id=123, job_id=123)
+    requests_mock.get(
+        command.api_url,
+        [{"exc": requests.ConnectionError}, {"json": {"data": {"id": 123}}}],
+    )
+    assert command.execute().json() == {"data": {"id": 123}}
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_token_bucket_delays_requests_over_the_rate():
+    bucket = TokenBucket(rate=10, capacity=2)
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+    assert bucket.reserve() == pytest.approx(0.2, abs=0.01)
+
+
+def test_token_bucket_disabled():
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.reserve() == 0 for _ in range(100))
@@ -0,0 +1,149 @@
+import json
+import pytest
+from click.testing import CliRunner
+from urllib.parse import parse_qs, urlparse
+from dbt_cloud.cli import dbt_cloud
+from dbt_cloud.command import DbtCloudRunGetCommand, DbtCloudRunListCommand
+from dbt_cloud.exc import DbtCloudRunTimeoutError
+from dbt_cloud.waiter import RunWaiter
+
+pytestmark = pytest.mark.run
+
+TOTAL_COUNT = 250
+
+
+@pytest.fixture
+def mock_run_list_pages(requests_mock):
+    def paginated_runs(request, context):
+        params = parse_qs(urlparse(request.url).query)
+        offset = int(params["offset"][0])
+        limit = int(params["limit"][0])
+        data = [
+            {"id": run_id} for run_id in range(offset, min(offset + limit, TOTAL_COUNT))
+        ]
+        return {
+            "data": data,
+            "extra": {"pagination": {"count": len(data), "total_count": TOTAL_COUNT}},
+        }
+
+    command = DbtCloudRunListCommand(api_token="foo", account_id=123)
+    requests_mock.get(command.api_url, json=paginated_runs)
+    return command
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_run_list_paginate(mock_run_list_pages, requests_mock, max_workers):
+    runs = list(mock_run_list_pages.paginate(max_workers=max_workers))
+    assert [run["id"] for run in runs] == list(range(TOTAL_COUNT))
+    assert requests_mock.call_count == 3
+
+
+def test_run_list_iter_items(mock_run_list_pages, requests_mock):
+    items = mock_run_list_pages.iter_items()
+    assert next(items) == {"id": 0}
+    assert requests_mock.call_count == 1
+    assert [run["id"] for run in items] == list(range(1, TOTAL_COUNT))
+    assert requests_mock.call_count == 3
+
+
+def test_run_list_iter_items_continuation_token(requests_mock):
+    command = DbtCloudRunListCommand(api_token="foo", account_id=123)
+    requests_mock.get(
+        command.api_url,
+        [
+            {
+                "json": {"data": [{"id": 1}, {"id": 2}]},
+                "headers": {"x-dbt-continuation-token": "next"},
+            },
+            {"json": {"data": [{"id": 3}]}},
+            {"json": {"data": []}},
+        ],
+    )
+    assert [run["id"] for run in command.iter_items()] == [1, 2, 3]
+    assert (
+        requests_mock.request_history[1].headers["x-dbt-continuation-token"] == "next"
+    )
+    assert requests_mock.call_count == 2
+
+
+def test_run_list_paginate_ndjson_output(mock_run_list_pages):
+    result = CliRunner().invoke(
+        dbt_cloud,
+        [
+            "run",
+            "list",
+            "--api-token",
+            "foo",
+            "--account-id",
+            "123",
+            "--paginate",
+            "--output",
+            "ndjson",
+        ],
+    )
+    assert result.exit_code == 0, result.output
+    lines = result.output.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == list(range(TOTAL_COUNT))
+    assert lines[0] == '{"id":0}'
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr("dbt_cloud.waiter.time.sleep", delays.append)
+    return delays
+
+
+def runs_response(*runs):
+    return {
+        "json": {"data": [{"id": run_id, "status": status} for run_id, status in runs]}
+    }
+
+
+def test_run_waiter_polls_runs_in_one_request(requests_mock, sleeps):
+    command = DbtCloudRunListCommand(api_token="foo", account_id=123)
+    requests_mock.get(
+        command.api_url,
+        [
+            runs_response((1, 1), (2, 3)),
+            runs_response((1, 3), (2, 3)),
+            runs_response((1, 3), (2, 10)),
+            runs_response((1, 20)),
+        ],
+    )
+    statuses = []
+    waiter = RunWaiter(
+        api_token="foo", account_id=123, min_interval=1, max_interval=2, backoff=2
+    )
+    runs = waiter.wait(
+        [1, 2], on_status=lambda run: statuses.append((run["id"], run["status"]))
+    )
+
+    assert {run_id: run["status"] for run_id, run in runs.items()} == {1: 20, 2: 10}
+    assert statuses == [(1, 1), (2, 3), (1, 3), (2, 10), (1, 20)]
+    assert sleeps == [1, 2, 2]
+    assert requests_mock.call_count == 4
+    assert requests_mock.request_history[0].qs["id__in"] == ["[1, 2]"]
+
+
+def test_run_waiter_fetches_runs_missing_from_list(requests_mock, sleeps):
+    requests_mock.get(
+        DbtCloudRunListCommand(api_token="foo", account_id=123).api_url,
+        json={"data": []},
+    )
+    requests_mock.get(
+        DbtCloudRunGetCommand(api_token="foo", account_id=123, run_id=1).api_url,
+        json={"data": {"id": 1, "status": 10}},
+    )
+    waiter = RunWaiter(api_token="foo", account_id=123)
+    assert waiter.wait_for_run(1)["status"] == 10
+
+
+def test_run_waiter_timeout(requests_mock, sleeps):
+    requests_mock.get(
+        DbtCloudRunListCommand(api_token="foo", account_id=123).api_url,
+        json=runs_response((1, 3))["json"],
+    )
+    waiter = RunWaiter(api_token="foo", account_id=123, timeout=0)
+    with pytest.raises(DbtCloudRunTimeoutError):
+        waiter.wait_for_run(1)
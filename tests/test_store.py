@@ -0,0 +1,54 @@
+import pytest
+from dbt_cloud.store import MetricStore
+
+pytestmark = pytest.mark.run
+
+
+def make_payload(run_id, collected_at, execution_time):
+    return {
+        "run_id": run_id,
+        "metrics": [
+            {
+                "unique_id": "model.jaffle_shop.orders",
+                "job_id": 43167,
+                "job_name": "pytest job",
+                "run_id": run_id,
+                "dbt_version": "1.5.0",
+                "execution_time": execution_time,
+                "affected_rows": 10,
+                "status": "success",
+                "collected_at": collected_at,
+            }
+        ],
+    }
+
+
+def test_metric_store_node_history(tmp_path):
+    path = str(tmp_path / "metrics.db")
+    with MetricStore(path) as store:
+        store.write(make_payload(2, "2023-07-02T00:00:00.000000Z", 2.0))
+        store.write(make_payload(1, "2023-07-01T00:00:00.000000Z", 1.0))
+        # Collecting a run again replaces its metrics
+        store.write(make_payload(2, "2023-07-02T00:00:00.000000Z", 3.0))
+
+    with MetricStore(path) as store:
+        history = store.get_node_history("model.jaffle_shop.orders")
+        assert [(m["run_id"], m["execution_time"]) for m in history] == [
+            (1, 1.0),
+            (2, 3.0),
+        ]
+        assert [
+            m["run_id"]
+            for m in store.get_node_history(
+                "model.jaffle_shop.orders", start="2023-07-02", end="2023-07-03"
+            )
+        ] == [2]
+
+
+def test_metric_store_node_history_uses_index(tmp_path):
+    with MetricStore(str(tmp_path / "metrics.db")) as store:
+        plan = store._connection.execute(
+            "explain query plan select * from node_metric where unique_id = ? order by collected_at",
+            ["model.jaffle_shop.orders"],
+        ).fetchall()
+    assert "node_metric_node_time" in plan[0][-1]